@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+"""This package contains the benchmarks used to keep track of the performance
+of the application. Each module can be run from the root of the repository as
+a script, e.g. 'python -m benchmarks.node_memory', and prints its results.
+The synthetic module is not a benchmark but generates the projects they use.
+"""
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+"""This benchmark measures the public functions of the data access layer on
+scratch databases filled with synthetic projects of increasing size: bulk and
+single creation, reads, renames (which cascade to children and associations),
+association updates and deletions. It only needs SQLAlchemy (no PySide) and
+writes its results to a JSON file, so that runs can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks import synthetic
+from src.model import database as db, dal
+
+
+def _time(function, *args):
+    """Returns the number of seconds needed to call the given function, whose
+    result is consumed if it is an iterator.
+    """
+    start = time.time()
+    result = function(*args)
+    if hasattr(result, '__next__') or hasattr(result, 'next'):
+        for unused_item in result:
+            pass
+    return time.time() - start
+
+
+def _time_calls(function, args_list):
+    """Returns the total number of seconds needed to call the given function
+    once for each tuple of arguments in the given list.
+    """
+    return sum(_time(function, *args) for args in args_list)
+
+
+def _measure(project, samples, rng):
+    """Stores the given project in the current (empty) DB and then measures the
+    operations on the given number of randomly chosen items. Returns a list of
+    (operation, calls, seconds) tuples.
+    """
+    req_records = project['requirements']
+    req_ids = [record['req_id'] for record in req_records]
+    uc_ids = [record['uc_id'] for record in project['use_cases']]
+    test_ids = [record['test_id'] for record in project['tests']]
+    results = [('create_project', 1, _time(synthetic.store_project, project))]
+    source_id = dal.get_source_id(project['sources'][0])
+    results.append(('create_requirement', samples, _time_calls(
+            dal.create_requirement, [('N{0:07d}'.format(i), 'Requirement',
+            'F', 'O', source_id, rng.choice(req_ids))
+            for i in range(samples)])))
+    # reads
+    for function in [dal.get_all_requirement_ids,
+            dal.get_all_requirement_names_and_descriptions,
+            dal.get_requirement_hierarchy, dal.get_use_case_hierarchy,
+            dal.get_all_requirement_table_rows, dal.get_use_case_report_rows,
+            dal.get_requirement_children_summary]:
+        results.append((function.__name__, 1, _time(function)))
+    sampled_req_ids = rng.sample(req_ids, min(samples, len(req_ids)))
+    sampled_uc_ids = rng.sample(uc_ids, min(samples, len(uc_ids)))
+    sampled_test_ids = rng.sample(test_ids, min(samples, len(test_ids)))
+    results.append(('get_requirement', len(sampled_req_ids), _time_calls(
+            dal.get_requirement, [(req_id,) for req_id in sampled_req_ids])))
+    results.append(('get_requirement_children_summary(id)',
+            len(sampled_req_ids), _time_calls(
+            dal.get_requirement_children_summary,
+            [(req_id,) for req_id in sampled_req_ids])))
+    # associations
+    results.append(('update_requirement_associations', len(sampled_req_ids),
+            _time_calls(dal.update_requirement_associations,
+            [(req_id, rng.sample(uc_ids, min(3, len(uc_ids))),
+            rng.sample(test_ids, min(3, len(test_ids))))
+            for req_id in sampled_req_ids])))
+    results.append(('update_use_case_associations', len(sampled_uc_ids),
+            _time_calls(dal.update_use_case_associations,
+            [(uc_id, rng.sample(req_ids, min(3, len(req_ids))))
+            for uc_id in sampled_uc_ids])))
+    # renames, which cascade to children and associations
+    results.append(('update_requirement_id', len(sampled_req_ids),
+            _time_calls(dal.update_requirement_id,
+            [(req_id, req_id + 'x') for req_id in sampled_req_ids])))
+    results.append(('update_use_case_id', len(sampled_uc_ids),
+            _time_calls(dal.update_use_case_id,
+            [(uc_id, uc_id + 'x') for uc_id in sampled_uc_ids])))
+    results.append(('update_test_id', len(sampled_test_ids),
+            _time_calls(dal.update_test_id,
+            [(test_id, test_id + 'x') for test_id in sampled_test_ids])))
+    # deletions
+    results.append(('delete_requirement', len(sampled_req_ids),
+            _time_calls(dal.delete_requirement,
+            [(req_id + 'x',) for req_id in sampled_req_ids])))
+    results.append(('delete_use_case', len(sampled_uc_ids),
+            _time_calls(dal.delete_use_case,
+            [(uc_id + 'x',) for uc_id in sampled_uc_ids])))
+    results.append(('delete_test', len(sampled_test_ids),
+            _time_calls(dal.delete_test,
+            [(test_id + 'x',) for test_id in sampled_test_ids])))
+    return results
+
+
+def _run(scale, args):
+    """Runs the benchmark on a scratch DB with a project of the given scale and
+    returns the list of results.
+    """
+    project = synthetic.generate_project(scale, args.depth, args.fan_out,
+            sources=args.sources, density=args.density, seed=args.seed)
+    dir_path = tempfile.mkdtemp()
+    try:
+        engine = db.use_database(os.path.join(dir_path, 'bench.sqlite'),
+                args.profile)
+        db.MappedBase.metadata.create_all(engine)
+        return _measure(project, args.samples, random.Random(args.seed))
+    finally:
+        db.Session.remove()
+        shutil.rmtree(dir_path)
+
+
+def main():
+    """Runs the benchmark at every scale, prints the results and writes them
+    to the output file.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', default='1000,10000,100000',
+            help='comma separated numbers of requirements')
+    parser.add_argument('--depth', type=int, default=4,
+            help='maximum depth of the requirement and use case trees')
+    parser.add_argument('--fan-out', type=int, default=5,
+            help='number of children per requirement and use case')
+    parser.add_argument('--sources', type=int, default=10,
+            help='number of requirement sources')
+    parser.add_argument('--density', type=float, default=2.0,
+            help='average number of use cases (and tests) per requirement')
+    parser.add_argument('--samples', type=int, default=100,
+            help='number of items on which single-item operations are run')
+    parser.add_argument('--profile', choices=sorted(db._PROFILES),
+            help='SQLite tuning profile (the configured one by default)')
+    parser.add_argument('--seed', type=int, default=0,
+            help='seed of the synthetic projects')
+    parser.add_argument('--output', default='benchmark_dal.json',
+            help='JSON file where the results are written')
+    args = parser.parse_args()
+    results = []
+    print('{0:>8} {1:>40} {2:>6} {3:>10} {4:>12}'.format('scale',
+            'operation', 'calls', 'seconds', 'ms per call'))
+    for scale in [int(scale) for scale in args.scales.split(',')]:
+        for operation, calls, seconds in _run(scale, args):
+            print('{0:>8} {1:>40} {2:>6} {3:>10.3f} {4:>12.3f}'.format(scale,
+                    operation, calls, seconds, 1000 * seconds / max(calls, 1)))
+            results.append({'scale': scale, 'operation': operation,
+                    'calls': calls, 'seconds': seconds})
+    with open(args.output, 'w') as output_file:
+        json.dump({'python': platform.python_version(),
+                'parameters': vars(args), 'results': results}, output_file,
+                indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""This benchmark compares the memory footprint of the nodes ItemModels use to
+store their forests with the one of the previous layout, where every node had
+an instance dictionary and its own (possibly empty) list of children. Both a
+flat model (like the test or source ones) and a tree with a given fan-out are
+measured, counting the nodes and their containers but not the shared IDs.
+"""
+
+import argparse
+import sys
+
+from src.model.qtbind import ItemNode, _NO_CHILDREN
+
+
+class LegacyItemNode(object):
+    """Node layout used by ItemModels before the slot-based ItemNode.
+    """
+    def __init__(self, item_id, parent=None):
+        self.item_id = item_id
+        self.children = []
+        self.parent = parent
+
+
+def _build_flat(node_class, count):
+    """Returns a list of the given number of nodes with no children.
+    """
+    return [node_class(str(i)) for i in range(count)]
+
+
+def _build_tree(node_class, count, fan_out):
+    """Returns a list of the given number of nodes linked in a tree where each
+    node has (at most) the given number of children, breadth first.
+    """
+    nodes = [node_class(str(i)) for i in range(count)]
+    for i, node in enumerate(nodes[1:], 1):
+        parent = nodes[(i - 1) // fan_out]
+        node.parent = parent
+        if not parent.children:
+            parent.children = []
+        parent.children.append(node)
+    return nodes
+
+
+def _measure(nodes):
+    """Returns the number of bytes taken by the given nodes, their instance
+    dictionaries (if any) and their lists of children (unless shared).
+    """
+    total = 0
+    for node in nodes:
+        total += sys.getsizeof(node)
+        if hasattr(node, '__dict__'):
+            total += sys.getsizeof(node.__dict__)
+        if node.children is not _NO_CHILDREN:
+            total += sys.getsizeof(node.children)
+    return total
+
+
+def main():
+    """Runs the benchmark for every requested size and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, nargs='+',
+            default=[1000, 10000, 100000], help='numbers of nodes to build')
+    parser.add_argument('--fan-out', type=int, default=5,
+            help='maximum number of children per node in trees')
+    args = parser.parse_args()
+    print('{0:>8} {1:>8} {2:>14} {3:>14} {4:>8}'.format(
+            'layout', 'nodes', 'legacy bytes', 'current bytes', 'ratio'))
+    for count in args.nodes:
+        for layout in ('flat', 'tree'):
+            if layout == 'flat':
+                legacy = _measure(_build_flat(LegacyItemNode, count))
+                current = _measure(_build_flat(ItemNode, count))
+            else:
+                legacy = _measure(
+                        _build_tree(LegacyItemNode, count, args.fan_out))
+                current = _measure(_build_tree(ItemNode, count, args.fan_out))
+            print('{0:>8} {1:>8} {2:>14} {3:>14} {4:>8.2f}'.format(
+                    layout, count, legacy, current, float(current) / legacy))
+
+if __name__ == '__main__':
+    main()
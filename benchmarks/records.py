@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""This benchmark compares the two ways of reading single items: the detached
+transfer objects returned by the ORM getters and the immutable records built
+from Core selects, on a scratch database filled with a synthetic project.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks import synthetic
+from src.model import database as db, dal
+
+
+def _time_reads(function, item_ids):
+    """Returns the number of seconds needed to read all the given items with
+    the given function.
+    """
+    start = time.time()
+    for item_id in item_ids:
+        function(item_id)
+    return time.time() - start
+
+
+def main():
+    """Runs the benchmark and prints the time per read of each getter.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requirements', type=int, default=10000,
+            help='number of requirements of the synthetic project')
+    parser.add_argument('--reads', type=int, default=2000,
+            help='number of items read with each getter')
+    parser.add_argument('--seed', type=int, default=0,
+            help='seed of the synthetic project')
+    args = parser.parse_args()
+    project = synthetic.generate_project(args.requirements, seed=args.seed)
+    rng = random.Random(args.seed)
+    dir_path = tempfile.mkdtemp()
+    try:
+        engine = db.use_database(os.path.join(dir_path, 'bench.sqlite'))
+        db.MappedBase.metadata.create_all(engine)
+        synthetic.store_project(project)
+        print('{0:>12} {1:>16} {2:>16} {3:>8}'.format('item', 'ORM (ms)',
+                'records (ms)', 'speedup'))
+        for item_name, ids, orm_getter, record_getter in [
+                ('requirement', [record['req_id'] for record
+                in project['requirements']], dal.get_requirement,
+                dal.get_requirement_record),
+                ('use case', [record['uc_id'] for record
+                in project['use_cases']], dal.get_use_case,
+                dal.get_use_case_record),
+                ('test', [record['test_id'] for record
+                in project['tests']], dal.get_test, dal.get_test_record)]:
+            item_ids = [rng.choice(ids) for unused_i in range(args.reads)]
+            orm = _time_reads(orm_getter, item_ids)
+            records = _time_reads(record_getter, item_ids)
+            print('{0:>12} {1:>16.3f} {2:>16.3f} {3:>8.2f}'.format(item_name,
+                    1000 * orm / args.reads, 1000 * records / args.reads,
+                    orm / records))
+    finally:
+        db.Session.remove()
+        shutil.rmtree(dir_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+"""This benchmark measures how the time needed to print the tables of a full
+report scales with the number of worker processes. The rows of the tables are
+generated synthetically (with a fixed seed), so no database is needed, and the
+files printed with each number of workers are checked to be identical.
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from src.controller import printers as pnt
+from src.model.constants import PRIORITY_LIST, TYPE_LIST
+
+
+def _random_text(rng, words):
+    """Returns a random sentence with the given number of words.
+    """
+    return ' '.join(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz')
+            for unused_i in range(rng.randint(2, 10)))
+            for unused_j in range(words))
+
+
+def _create_printers(target_dir_path, rows_per_table, seed):
+    """Returns the printers of the tables of a full report, each with its own
+    synthetic rows, writing to files within the given directory.
+    """
+    rng = random.Random(seed)
+    printers = []
+    for req_type in TYPE_LIST:
+        for priority in PRIORITY_LIST:
+            rows = [('R{0}{1}.{2}'.format(req_type, priority, i),
+                    _random_text(rng, 30), 'Source', '--')
+                    for i in range(rows_per_table)]
+            printers.append(pnt.RequirementTablePrinter(req_type, priority,
+                    os.path.join(target_dir_path,
+                    'reqlist' + req_type + priority + '.tex'), rows))
+    rows = [('UC{0}'.format(i), _random_text(rng, 30), None)
+            for i in range(rows_per_table)]
+    printers.append(pnt.UseCaseTablePrinter(
+            os.path.join(target_dir_path, 'uclist.tex'), rows))
+    rows = [('UC{0}'.format(i), ['R{0}'.format(rng.randint(0, 1000))
+            for unused_j in range(rng.randint(0, 10))])
+            for i in range(rows_per_table)]
+    printers.append(pnt.UseCaseRequirementTrackPrinter(
+            os.path.join(target_dir_path, 'ucreqtrack.tex'), rows))
+    return printers
+
+
+def _digest(dir_path):
+    """Returns a digest of the content of all the files in the directory.
+    """
+    digest = hashlib.sha1()
+    for file_name in sorted(os.listdir(dir_path)):
+        with open(os.path.join(dir_path, file_name), 'rb') as input_file:
+            digest.update(input_file.read())
+    return digest.hexdigest()
+
+
+def main():
+    """Runs the benchmark for every number of workers and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000,
+            help='number of rows in each table')
+    parser.add_argument('--max-workers', type=int,
+            default=multiprocessing.cpu_count(),
+            help='maximum number of worker processes')
+    parser.add_argument('--seed', type=int, default=0,
+            help='seed of the synthetic data generator')
+    args = parser.parse_args()
+    print('{0:>8} {1:>10} {2:>8}'.format('workers', 'seconds', 'speedup'))
+    baseline = None
+    reference_digest = None
+    for workers in range(1, args.max_workers + 1):
+        target_dir_path = tempfile.mkdtemp()
+        try:
+            printers = _create_printers(target_dir_path, args.rows, args.seed)
+            start = time.time()
+            pnt.render(printers, workers)
+            elapsed = time.time() - start
+            digest = _digest(target_dir_path)
+        finally:
+            shutil.rmtree(target_dir_path)
+        baseline = baseline or elapsed
+        reference_digest = reference_digest or digest
+        if digest != reference_digest:
+            raise RuntimeError('Output differs with {0} workers'.format(
+                    workers))
+        print('{0:>8} {1:>10.3f} {2:>8.2f}'.format(workers, elapsed,
+                baseline / elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""This benchmark compares the SQLite tuning profiles on scratch databases,
+measuring single-row writes (one transaction each, like the ones issued by the
+user interface), single-row reads, a bulk import of requirements and the
+loading of the requirement tree, both as a whole and level by level (lazy
+models).
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from src.model import database as db, dal
+
+
+def _create_records(count, fan_out, source_id):
+    """Returns the records of the given number of requirements, linked in a
+    tree where each requirement has (at most) the given number of children.
+    """
+    return [{'req_id': 'R{0:07d}'.format(i), 'description': 'Requirement',
+            'req_type': 'F', 'priority': 'O', 'source_id': source_id,
+            'parent_id': 'R{0:07d}'.format((i - 1) // fan_out) if i else None}
+            for i in range(count)]
+
+
+def _time(function, *args):
+    """Returns the number of seconds needed to call the given function.
+    """
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+
+def _load_levels():
+    """Loads the whole requirement tree level by level.
+    """
+    pending_ids = [None]
+    while pending_ids:
+        req_id = pending_ids.pop()
+        pending_ids.extend(child_id for child_id, child_count
+                in dal.get_requirement_children_summary(req_id)
+                if child_count)
+
+
+def _run(profile_name, args):
+    """Runs the benchmark on a scratch DB tuned with the given profile and
+    returns the list of timings.
+    """
+    dir_path = tempfile.mkdtemp()
+    try:
+        engine = db.use_database(os.path.join(dir_path, 'bench.sqlite'),
+                profile_name)
+        db.MappedBase.metadata.create_all(engine)
+        dal.create_source('Source')
+        source_id = dal.get_source_id('Source')
+        start = time.time()
+        for i in range(args.single_writes):
+            dal.create_requirement('S{0:07d}'.format(i), 'Requirement', 'F',
+                    'O', source_id)
+        single = time.time() - start
+        start = time.time()
+        for i in range(args.single_writes):
+            dal.get_requirement_record('S{0:07d}'.format(i))
+        reads = time.time() - start
+        bulk = _time(dal.create_requirements,
+                _create_records(args.requirements, args.fan_out, source_id))
+        tree = _time(dal.get_requirement_hierarchy)
+        levels = _time(_load_levels)
+        return [single, reads, bulk, tree, levels]
+    finally:
+        db.Session.remove()
+        db.get_engine().dispose()
+        shutil.rmtree(dir_path)
+
+
+def main():
+    """Runs the benchmark for every tuning profile and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--single-writes', type=int, default=500,
+            help='number of requirements created (and then read) one at a '
+            'time')
+    parser.add_argument('--requirements', type=int, default=20000,
+            help='number of requirements created in bulk')
+    parser.add_argument('--fan-out', type=int, default=5,
+            help='maximum number of children per requirement')
+    args = parser.parse_args()
+    print('{0:>13} {1:>14} {2:>13} {3:>10} {4:>10} {5:>12}'.format(
+            'profile', 'single writes', 'single reads', 'bulk', 'tree load',
+            'level load'))
+    for profile_name in sorted(db._PROFILES):
+        print('{0:>13} {1:>14.3f} {2:>13.3f} {3:>10.3f} {4:>10.3f} '
+                '{5:>12.3f}'.format(profile_name, *_run(profile_name, args)))
+
+if __name__ == '__main__':
+    main()
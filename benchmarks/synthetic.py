@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""This module generates synthetic projects for the benchmarks: requirement and
+use case forests with a given depth and fan-out, tests, sources and random
+associations, all reproducible through a seed. Projects are plain records that
+can be stored with the bulk creation functions of the data access layer.
+"""
+
+import random
+
+from src.model import dal
+from src.model.constants import PRIORITY_LIST, TYPE_LIST
+
+
+def _random_text(rng, words):
+    """Returns a random sentence with the given number of words.
+    """
+    return ' '.join(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz')
+            for unused_i in range(rng.randint(2, 10)))
+            for unused_j in range(words))
+
+
+def _get_parent_positions(count, depth, fan_out):
+    """Returns the position of the parent (None for top level items) of each
+    one of the given number of items, arranged breadth first in a forest of
+    complete trees having the given fan-out and no more than the given depth.
+    """
+    tree_size = sum(fan_out ** level for level in range(depth))
+    roots = max(-(-count // tree_size), 1)
+    return [None if i < roots else (i - roots) // fan_out
+            for i in range(count)]
+
+
+def _draw_count(rng, mean):
+    """Returns a random non-negative integer with the given mean.
+    """
+    return rng.randint(0, int(round(2 * mean)))
+
+
+def generate_project(requirements, depth=4, fan_out=5, use_cases=None,
+        tests=None, sources=10, density=2.0, seed=0):
+    """Returns a dictionary describing a synthetic project with the given
+    number of requirements (by default a tenth as many use cases and a fifth
+    as many tests). Requirements and use cases form forests with the given
+    depth and fan-out, and each requirement is associated on average with the
+    given number of use cases and of tests. The 'sources' entry holds the
+    source names, while the 'tests', 'use_cases' and 'requirements' entries
+    hold records for the corresponding bulk creation functions (requirement
+    records refer to their source by name, under the 'source_name' key).
+    """
+    rng = random.Random(seed)
+    if use_cases is None:
+        use_cases = max(requirements // 10, 1)
+    if tests is None:
+        tests = max(requirements // 5, 1)
+    source_names = ['Source {0}'.format(i) for i in range(sources)]
+    test_records = [{'test_id': 'T{0:07d}'.format(i),
+            'description': _random_text(rng, 15)} for i in range(tests)]
+    uc_ids = ['UC{0:07d}'.format(i) for i in range(use_cases)]
+    uc_records = [{'uc_id': uc_id, 'description': _random_text(rng, 30),
+            'parent_id': uc_ids[parent] if parent is not None else None}
+            for uc_id, parent in zip(uc_ids,
+            _get_parent_positions(use_cases, depth, fan_out))]
+    req_ids = ['R{0:07d}'.format(i) for i in range(requirements)]
+    req_records = []
+    for req_id, parent in zip(req_ids,
+            _get_parent_positions(requirements, depth, fan_out)):
+        req_records.append({'req_id': req_id,
+                'description': _random_text(rng, 30),
+                'req_type': rng.choice(TYPE_LIST),
+                'priority': rng.choice(PRIORITY_LIST),
+                'source_name': rng.choice(source_names),
+                'parent_id': req_ids[parent] if parent is not None else None,
+                'use_cases': rng.sample(uc_ids, min(_draw_count(rng, density),
+                len(uc_ids))),
+                'tests': [record['test_id'] for record in rng.sample(
+                test_records, min(_draw_count(rng, density), tests))]})
+    return {'sources': source_names, 'tests': test_records,
+            'use_cases': uc_records, 'requirements': req_records}
+
+
+def store_project(project):
+    """Stores the given project in the current DB through the bulk creation
+    functions of the data access layer. Returns the list of errors reported.
+    """
+    errors = list(dal.create_sources(project['sources']))
+    source_ids = dict((name, dal.get_source_id(name))
+            for name in project['sources'])
+    errors.extend(dal.create_tests(project['tests']))
+    errors.extend(dal.create_use_cases(project['use_cases']))
+    req_records = []
+    for record in project['requirements']:
+        record = dict(record)
+        record['source_id'] = source_ids[record.pop('source_name')]
+        req_records.append(record)
+    errors.extend(dal.create_requirements(req_records))
+    return errors
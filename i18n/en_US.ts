@@ -151,6 +151,14 @@
         <translation type="unfinished"></translation>
     </message>
 </context>
+<context>
+    <name>LoadingDisplay</name>
+    <message>
+        <location filename="src/gui/displays.py" line="335"/>
+        <source>Loading...</source>
+        <translation type="unfinished"></translation>
+    </message>
+</context>
 <context>
     <name>MainWidget</name>
     <message>
@@ -241,6 +249,11 @@
         <source>Select location</source>
         <translation type="unfinished"></translation>
     </message>
+    <message>
+        <location filename="src/gui/window.py" line="67"/>
+        <source>Full report</source>
+        <translation type="unfinished"></translation>
+    </message>
 </context>
 <context>
     <name>PrintRequirementDialog</name>
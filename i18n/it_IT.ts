@@ -152,6 +152,14 @@
         <translation>Nome</translation>
     </message>
 </context>
+<context>
+    <name>LoadingDisplay</name>
+    <message>
+        <location filename="src/gui/displays.py" line="335"/>
+        <source>Loading...</source>
+        <translation>Caricamento...</translation>
+    </message>
+</context>
 <context>
     <name>MainWidget</name>
     <message>
@@ -242,6 +250,11 @@
         <source>Select location</source>
         <translation>Seleziona percorso</translation>
     </message>
+    <message>
+        <location filename="src/gui/window.py" line="67"/>
+        <source>Full report</source>
+        <translation>Rapporto completo</translation>
+    </message>
 </context>
 <context>
     <name>PrintRequirementDialog</name>
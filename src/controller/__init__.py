@@ -2,8 +2,15 @@
 
 """This package contains the application controller and should not be imported
 anywhere except in the application entry point where the controller must be
-instantiated and started.
+instantiated and started (the printers can also be used headless, e.g. by the
+benchmarks).
 """
 
-# needed at startup for controller initialization
-from src.controller.events import ApplicationController
+# needed at startup for controller initialization (only if PySide is there,
+# but any other import error must not go unnoticed)
+try:
+    import PySide as _pyside
+except ImportError:
+    _pyside = None
+if _pyside is not None:
+    from src.controller.events import ApplicationController
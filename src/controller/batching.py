@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the logic to handle at once the batch of events that
+is produced by saving an item: updates that are overridden by later ones in
+the same batch are discarded and the remaining events are handled within a
+single unit of work, so that they are either all persisted or not at all.
+"""
+
+from src import model as mdl
+
+
+# events which set some property of an item to a new value (thus only the last
+# one of a batch matters for each item) mapped to the parameter naming the item
+COALESCED_EVENTS = {
+    'update_requirement_associations': 'req_id',
+    'update_requirement_description': 'req_id',
+    'update_requirement_parent_id': 'req_id',
+    'update_requirement_priority': 'req_id',
+    'update_requirement_source': 'req_id',
+    'update_requirement_type': 'req_id',
+    'update_source_name': 'source_id',
+    'update_test_associations': 'test_id',
+    'update_test_description': 'test_id',
+    'update_use_case_associations': 'uc_id',
+    'update_use_case_description': 'uc_id',
+    'update_use_case_parent_id': 'uc_id'}
+
+
+def _get_update_key(event_name, params):
+    """Returns the key identifying the kind of update and the updated item for
+    the events that can be coalesced, None for all the other events.
+    """
+    if event_name in COALESCED_EVENTS:
+        return (event_name, params[COALESCED_EVENTS[event_name]])
+
+
+def coalesce(events):
+    """Returns the given (event name, parameters) pairs without those updates
+    which are followed by an update of the same kind to the same item, keeping
+    the relative order of the remaining events.
+    """
+    last_positions = {}
+    for position, (event_name, params) in enumerate(events):
+        last_positions[_get_update_key(event_name, params)] = position
+    return [(event_name, params)
+            for position, (event_name, params) in enumerate(events)
+            if _get_update_key(event_name, params) is None or
+            last_positions[_get_update_key(event_name, params)] == position]
+
+
+def run_batch(events, handle_event):
+    """Passes the given (event name, parameters) pairs, once coalesced, to the
+    given handler function within a single unit of work. If any event fails,
+    the unit is discarded and the exception is raised again, otherwise it is
+    committed. Returns True if the changes have been committed.
+    """
+    mdl.begin_unit_of_work()
+    try:
+        for event_name, params in coalesce(events):
+            handle_event(event_name, params)
+    except Exception:
+        mdl.end_unit_of_work(discard=True)
+        raise
+    return mdl.end_unit_of_work()
@@ -7,30 +7,65 @@ model data access layer, decoupling its structure from the user interface.
 """
 
 from contextlib import contextmanager
+import multiprocessing
 
 from PySide import QtCore
 from sqlalchemy.exc import SQLAlchemyError
 
 from src import model as mdl, gui
-from src.controller import printers as pnt
+from src.controller import batching, printers as pnt
+
+
+# environment variable that overrides the maximum number of worker processes
+# used to print the tables of a full report, set as the 'workers' option of
+# the 'report' section of the configuration file (the number of CPUs if unset)
+_REPORT_WORKERS_VARIABLE = 'REQMANAGER_REPORT_WORKERS'
+# display data invalidated by the events of the batch being handled (if any)
+_batch_invalidations = None
 
 
 class ApplicationController(QtCore.QObject):
     """This object acts as an observer on the user interface and reacts to the
     events originating from it. Its handle_event public slot then redirects the
-    event to the proper handler function.
+    event to the proper handler function, while the handle_event_batch slot
+    does the same for all the events produced by saving an item at once.
     """
     def __init__(self):
         super(ApplicationController, self).__init__()
 
     @QtCore.Slot(str, dict)
     def handle_event(self, event_name, params):
-        """Call the correct handler within this module, appending _handle_ to
-        the name of the event to obtain the conventional event handler name.
+        """Calls the handler registered for the given event (if any).
         """
-        function_name = '_handle_{0}'.format(event_name)
-        if function_name in globals():
-            globals()[function_name](**params)
+        handler = _DISPATCH_TABLE.get(event_name)
+        if handler:
+            with mdl.sql_scope(handler.__name__):
+                handler(**params)
+
+    @QtCore.Slot(list)
+    def handle_event_batch(self, events):
+        """Handles a batch of (event name, parameters) pairs within a single
+        unit of work, after discarding those updates that are overridden by
+        later ones in the same batch. If any event fails, the changes of the
+        whole batch are rolled back and the models are reloaded.
+        """
+        global _batch_invalidations
+        committed = False
+        _batch_invalidations = []
+        # the statements of the commit are charged to the batch itself
+        with mdl.sql_scope('handle_event_batch'):
+            try:
+                with _extreme_caution():
+                    committed = batching.run_batch(events, self.handle_event)
+            except Exception:
+                _batch_invalidations = None
+                _reload_models()
+                raise
+        targets, _batch_invalidations = _batch_invalidations, None
+        if committed:
+            _invalidate_display_data(*targets)
+        else:
+            _reload_models()
 
 
 @contextmanager
@@ -44,13 +79,42 @@ def _extreme_caution():
         gui.get_main_window().display_message(exc.message)
 
 
+def _reload_models():
+    """Rebuilds the item models and the catalogs from the DB content, e.g.
+    after the changes they had been updated with have been rolled back.
+    """
+    for model in [mdl.get_requirement_model(), mdl.get_use_case_model(),
+            mdl.get_test_model(), mdl.get_source_model()]:
+        model.initialize()
+    for catalog in [mdl.get_requirement_catalog(), mdl.get_test_catalog(),
+            mdl.get_use_case_catalog()]:
+        catalog.reset()
+    _invalidate_display_data((None, None))
+
+
+def _invalidate_display_data(*targets):
+    """Discards the cached data of the displays of the given (kind, item ID)
+    targets, a None ID standing for all the items of the kind and a None kind
+    for all the items. Within a batch, targets are invalidated once again
+    after the batch is committed, since the data may have been prefetched in
+    the meantime as it was before the commit.
+    """
+    cache = gui.get_display_cache()
+    for kind, item_id in targets:
+        cache.invalidate(kind, item_id)
+    if _batch_invalidations is not None:
+        _batch_invalidations.extend(targets)
+
+
 def _handle_create_requirement(data):
     """Creates a new requirement and resets the requirement model.
     """
     with _extreme_caution():
         mdl.dal.create_requirement(**data)
+        _invalidate_display_data((gui.REQUIREMENT, None))
         mdl.get_requirement_model().append_child_to_parent(
                 data['req_id'], data['parent_id'])
+        mdl.get_requirement_catalog().add(data['req_id'], data['description'])
 
 
 def _handle_create_source(data):
@@ -58,6 +122,7 @@ def _handle_create_source(data):
     """
     with _extreme_caution():
         mdl.dal.create_source(**data)
+        _invalidate_display_data((gui.SOURCE, None), (gui.REQUIREMENT, None))
         new_source_id = mdl.dal.get_source_id(data['source_name'])
         mdl.get_source_model().append_child_to_parent(new_source_id)
 
@@ -69,6 +134,7 @@ def _handle_create_test(data):
         mdl.dal.create_test(**data)
         mdl.get_test_model().append_child_to_parent(
                 data['test_id'], data['parent_id'])
+        mdl.get_test_catalog().add(data['test_id'], data['description'])
 
 
 def _handle_create_use_case(data):
@@ -76,15 +142,19 @@ def _handle_create_use_case(data):
     """
     with _extreme_caution():
         mdl.dal.create_use_case(**data)
+        _invalidate_display_data((gui.USE_CASE, None))
         mdl.get_use_case_model().append_child_to_parent(
                 data['uc_id'], data['parent_id'])
+        mdl.get_use_case_catalog().add(data['uc_id'], data['description'])
 
 
 def _handle_delete_requirement(req_id):
     """Deletes a requirement and rebuilds all models basing on the DB content.
     """
     mdl.dal.delete_requirement(req_id)
+    _invalidate_display_data((None, None))
     mdl.get_requirement_model().delete_item(req_id)
+    mdl.get_requirement_catalog().remove(req_id)
 
 
 def _handle_delete_source(source_id):
@@ -92,6 +162,7 @@ def _handle_delete_source(source_id):
     """
     with _extreme_caution():
         mdl.dal.delete_source(source_id)
+        _invalidate_display_data((gui.SOURCE, None), (gui.REQUIREMENT, None))
         mdl.get_source_model().delete_item(source_id)
 
 
@@ -99,14 +170,18 @@ def _handle_delete_test(test_id):
     """Deletes a test and rebuilds all models basing on the DB content.
     """
     mdl.dal.delete_test(test_id)
+    _invalidate_display_data((gui.TEST, test_id), (gui.REQUIREMENT, None))
     mdl.get_test_model().delete_item(test_id)
+    mdl.get_test_catalog().remove(test_id)
 
 
 def _handle_delete_use_case(uc_id):
     """Deletes a use case and rebuilds all models basing on the DB content.
     """
     mdl.dal.delete_use_case(uc_id)
+    _invalidate_display_data((gui.USE_CASE, None), (gui.REQUIREMENT, None))
     mdl.get_use_case_model().delete_item(uc_id)
+    mdl.get_use_case_catalog().remove(uc_id)
 
 
 def _handle_print_requirement_list(req_type, priority, target_path):
@@ -116,6 +191,23 @@ def _handle_print_requirement_list(req_type, priority, target_path):
     pnt.RequirementTablePrinter(req_type, priority, target_path).run()
 
 
+def _get_report_workers():
+    """Returns the maximum number of worker processes used to print a full
+    report, as configured or, if not (validly) configured, the number of CPUs.
+    """
+    try:
+        return max(int(mdl.get_setting(_REPORT_WORKERS_VARIABLE, 'workers',
+                'report')), 1)
+    except (TypeError, ValueError):
+        return multiprocessing.cpu_count()
+
+
+def _handle_print_report(target_path):
+    """Prints all the tables plus a master document to the given directory.
+    """
+    pnt.ReportPrinter(target_path, _get_report_workers()).run()
+
+
 def _handle_print_use_case_list(target_path):
     """Prints the list of the use cases to the given target file.
     """
@@ -134,12 +226,16 @@ def _handle_update_requirement_associations(req_id, newly_associated_use_cases,
     """
     mdl.dal.update_requirement_associations(req_id, newly_associated_use_cases,
         newly_associated_tests)
+    _invalidate_display_data((gui.REQUIREMENT, req_id),
+            (gui.USE_CASE, None), (gui.TEST, None))
 
 
 def _handle_update_requirement_description(req_id, description):
     """Updates the descriptions for the requirement with the given ID.
     """
     mdl.dal.update_requirement_description(req_id, description)
+    _invalidate_display_data((gui.REQUIREMENT, req_id))
+    mdl.get_requirement_catalog().update_description(req_id, description)
 
 
 def _handle_update_requirement_id(req_id, new_req_id):
@@ -147,13 +243,16 @@ def _handle_update_requirement_id(req_id, new_req_id):
     """
     with _extreme_caution():
         mdl.dal.update_requirement_id(req_id, new_req_id)
+        _invalidate_display_data((None, None))
         mdl.get_requirement_model().update_item_id(req_id, new_req_id)
+        mdl.get_requirement_catalog().rename(req_id, new_req_id)
 
 
 def _handle_update_requirement_parent_id(req_id, parent_id):
     """Updates the parent ID of the requirement with the given ID.
     """
     mdl.dal.update_requirement_parent_id(req_id, parent_id)
+    _invalidate_display_data((gui.REQUIREMENT, req_id))
     mdl.get_requirement_model().update_item_parent(req_id, parent_id)
 
 
@@ -161,6 +260,7 @@ def _handle_update_requirement_priority(req_id, priority):
     """Updates the priority level of the requirement with the given ID.
     """
     mdl.dal.update_requirement_priority(req_id, priority)
+    _invalidate_display_data((gui.REQUIREMENT, req_id))
 
 
 def _handle_update_source_name(source_id, source_name):
@@ -168,30 +268,36 @@ def _handle_update_source_name(source_id, source_name):
     """
     with _extreme_caution():
         mdl.dal.update_source_name(source_id, source_name)
+        _invalidate_display_data((gui.SOURCE, None), (gui.REQUIREMENT, None))
 
 
 def _handle_update_requirement_source(req_id, source_name):
     """Updates the source of the requirement with the given ID.
     """
     mdl.dal.update_requirement_source(req_id, source_name)
+    _invalidate_display_data((gui.REQUIREMENT, req_id))
 
 
 def _handle_update_requirement_type(req_id, req_type):
     """Updates the type of the requirement with the given ID.
     """
     mdl.dal.update_requirement_type(req_id, req_type)
+    _invalidate_display_data((gui.REQUIREMENT, req_id))
 
 
 def _handle_update_test_associations(test_id, newly_associated_requirements):
     """Updates the requirement associations for the test with the given ID.
     """
     mdl.dal.update_test_associations(test_id, newly_associated_requirements)
+    _invalidate_display_data((gui.TEST, test_id), (gui.REQUIREMENT, None))
 
 
 def _handle_update_test_description(test_id, description):
     """Updates the description of the test with the given ID.
     """
     mdl.dal.update_test_description(test_id, description)
+    _invalidate_display_data((gui.TEST, test_id))
+    mdl.get_test_catalog().update_description(test_id, description)
 
 
 def _handle_update_test_id(test_id, new_test_id):
@@ -199,19 +305,24 @@ def _handle_update_test_id(test_id, new_test_id):
     """
     with _extreme_caution():
         mdl.dal.update_test_id(test_id, new_test_id)
+        _invalidate_display_data((gui.TEST, test_id), (gui.REQUIREMENT, None))
         mdl.get_test_model().update_item_id(test_id, new_test_id)
+        mdl.get_test_catalog().rename(test_id, new_test_id)
 
 
 def _handle_update_use_case_associations(uc_id, newly_associated_requirements):
     """Updates the requirement associations for the use case with the given ID.
     """
     mdl.dal.update_use_case_associations(uc_id, newly_associated_requirements)
+    _invalidate_display_data((gui.USE_CASE, uc_id), (gui.REQUIREMENT, None))
 
 
 def _handle_update_use_case_description(uc_id, description):
     """Updates the description of the use case with the given ID.
     """
     mdl.dal.update_use_case_description(uc_id, description)
+    _invalidate_display_data((gui.USE_CASE, uc_id))
+    mdl.get_use_case_catalog().update_description(uc_id, description)
 
 
 def _handle_update_use_case_id(uc_id, new_uc_id):
@@ -219,11 +330,20 @@ def _handle_update_use_case_id(uc_id, new_uc_id):
     """
     with _extreme_caution():
         mdl.dal.update_use_case_id(uc_id, new_uc_id)
+        _invalidate_display_data((gui.USE_CASE, None), (gui.REQUIREMENT, None))
         mdl.get_use_case_model().update_item_id(uc_id, new_uc_id)
+        mdl.get_use_case_catalog().rename(uc_id, new_uc_id)
 
 
 def _handle_update_use_case_parent_id(uc_id, parent_id):
     """Updates the parent ID of a given use case.
     """
     mdl.dal.update_use_case_parent_id(uc_id, parent_id)
+    _invalidate_display_data((gui.USE_CASE, uc_id))
     mdl.get_use_case_model().update_item_parent(uc_id, parent_id)
+
+
+# handler functions of the events, indexed by the names of the events
+_DISPATCH_TABLE = dict((name[len('_handle_'):], function)
+        for name, function in list(globals().items())
+        if name.startswith('_handle_'))
@@ -1,38 +1,96 @@
 
+import multiprocessing
+import os
+
 from src import model as mdl
 
 
+# size (in bytes) of the buffer used when writing to the output files
+_BUFFER_SIZE = 64 * 1024
+# name of the master document including all the tables of a report
+_REPORT_FILE_NAME = 'report.tex'
+# number of rows a report must have for each worker process it is printed by,
+# since smaller reports are printed faster than worker processes are started
+_ROWS_PER_WORKER = 5000
+
+
+def render(printers, workers=1):
+    """Runs the given printers, spreading them over a pool of the given number
+    of worker processes if more than one is requested. Each printer is sent to
+    its worker together with the rows it has to print, which act as a read-only
+    snapshot, so printers given here should not need to query the DB. Since
+    each printer writes to its own file, the output does not depend on the
+    number of workers. Workers are spawned rather than forked, since the
+    calling process may be running other threads (e.g. the GUI loaders), so
+    printers are run in the calling process where spawning is not available.
+    """
+    workers = min(workers, len(printers))
+    get_context = getattr(multiprocessing, 'get_context', None)
+    if workers <= 1 or get_context is None:  # Python 2 can only fork
+        for printer in printers:
+            printer.run()
+        return
+    pool = get_context('spawn').Pool(workers)
+    try:
+        pool.map(_run_printer, printers, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _run_printer(printer):
+    """Runs the given printer (module level function to be used by workers).
+    """
+    printer.run()
+
+
 class LaTeXPrinter(object):
     def __init__(self, target_file_path):
         self._target_file_path = target_file_path
 
     def run(self):
-        with open(self._target_file_path, 'w') as output:
-            text = self._generate_text()
-            output.write(text)
+        """Writes the text to the target file piece by piece, as it is being
+        generated, so that the whole document is never held in memory.
+        """
+        with open(self._target_file_path, 'w', _BUFFER_SIZE) as output:
+            output.writelines(self._generate_text())
 
     def _generate_text(self):
+        """Returns an iterable of the pieces of text making up the document.
+        """
         raise NotImplementedError('Override me!')
 
 
 class TablePrinter(LaTeXPrinter):
-    def __init__(self, target_file_path):
+    """Base class for the printers of LaTeX tables. The rows of the table can
+    be provided in advance (e.g. when many tables are printed from a single
+    read of the DB), otherwise subclasses query the model for them.
+    """
+    def __init__(self, target_file_path, rows=None):
         super(TablePrinter, self).__init__(target_file_path)
+        self._rows = rows
+
+    @property
+    def row_count(self):
+        """Number of rows of the table if they have been provided in advance,
+        None otherwise.
+        """
+        if self._rows is not None:
+            return len(self._rows)
 
     def _generate_text(self):
-        text = '\\rowcolors{3}{aubergine}{white}\n'
-        text += self._get_table_definition()
-        text += '\\toprule\n'
-        text += self._get_headers()
-        text += '\\midrule\n\\endhead\n'
+        yield '\\rowcolors{3}{aubergine}{white}\n'
+        yield self._get_table_definition()
+        yield '\\toprule\n'
+        yield self._get_headers()
+        yield '\\midrule\n\\endhead\n'
         for element in self._get_content():
-            text += ' & '.join(element) + '\\\\\n'
-        text += '\\bottomrule\n'
+            yield ' & '.join(element) + '\\\\\n'
+        yield '\\bottomrule\n'
         caption, label = self._get_caption_and_label()
-        text += ('\\rowcolor{white}' + '\\caption{' + caption +
-                 '}\\label{' + label + '}\n')
-        text += '\\end{longtable}\n'
-        return text
+        yield ('\\rowcolor{white}' + '\\caption{' + caption +
+               '}\\label{' + label + '}\n')
+        yield '\\end{longtable}\n'
 
     def _get_table_definition(self):
         raise NotImplementedError('Override me!')
@@ -53,9 +111,8 @@ class TablePrinter(LaTeXPrinter):
 
 
 class UseCaseTablePrinter(TablePrinter):
-    def __init__(self, target_file_path):
-        super(UseCaseTablePrinter, self).__init__(target_file_path)
-        self._uc_id_list = mdl.dal.get_all_use_case_ids()
+    def __init__(self, target_file_path, rows=None):
+        super(UseCaseTablePrinter, self).__init__(target_file_path, rows)
 
     def _get_table_definition(self):
         return '\\begin{longtable}{lp{.5\\textwidth}l}\n'
@@ -68,21 +125,21 @@ class UseCaseTablePrinter(TablePrinter):
         """Returns an iterable (generator) containing a 3-tuple with the
         ID, description and parent of every use case.
         """
-        for uc_id in self._uc_id_list:
-            uc = mdl.dal.get_use_case(uc_id)
-            yield (uc.uc_id, uc.description, uc.parent_id or '--')
+        rows = self._rows
+        if rows is None:
+            rows = mdl.dal.get_use_case_table_rows()
+        for uc_id, description, parent_id in rows:
+            yield (uc_id, description, parent_id or '--')
 
     def _get_caption_and_label(self):
         return ('Prospetto riepilogativo dei casi d\'uso', 'tab:uclist')
 
 
 class RequirementTablePrinter(TablePrinter):
-    def __init__(self, req_type, priority, target_file_path):
-        super(RequirementTablePrinter, self).__init__(target_file_path)
+    def __init__(self, req_type, priority, target_file_path, rows=None):
+        super(RequirementTablePrinter, self).__init__(target_file_path, rows)
         self._req_type = req_type
         self._priority = priority
-        self._req_id_list = mdl.dal.get_all_requirement_ids_spec(
-                    req_type, priority)
 
     def _get_table_definition(self):
         return '\\begin{longtable}{lp{.5\\textwidth}ll}\n'
@@ -93,11 +150,13 @@ class RequirementTablePrinter(TablePrinter):
                 '\\sffamily\\bfseries Padre\\\\\n')
 
     def _get_content(self):
-        for req_id in self._req_id_list:
-            req = mdl.dal.get_requirement(req_id)
-            source = mdl.dal.get_source(req.source_id)
-            yield (req.req_id, req.description, source.name,
-                   req.parent_id or '--')
+        rows = self._rows
+        if rows is None:
+            rows = mdl.dal.get_requirement_table_rows(self._req_type,
+                    self._priority)
+        for req_id, description, source_name, parent_id in rows:
+            yield (req_id, description, source_name or '--',
+                   parent_id or '--')
 
     def _get_caption_and_label(self):
         return ('Elenco dei requisiti {0} {1}.'.format(
@@ -110,9 +169,9 @@ class RequirementTablePrinter(TablePrinter):
 
 
 class UseCaseRequirementTrackPrinter(TablePrinter):
-    def __init__(self, target_file_path):
-        super(UseCaseRequirementTrackPrinter, self).__init__(target_file_path)
-        self._uc_id_list = mdl.dal.get_all_use_case_ids()
+    def __init__(self, target_file_path, rows=None):
+        super(UseCaseRequirementTrackPrinter, self).__init__(target_file_path,
+                rows)
 
     def _get_table_definition(self):
         return '\\begin{longtable}{lp{.8\textwidth}}\n'
@@ -122,9 +181,80 @@ class UseCaseRequirementTrackPrinter(TablePrinter):
                 '\\sffamily\\bfseries Requisiti associati\\\\\n')
 
     def _get_content(self):
-        for uc_id in self._uc_id_list:
-            req_ids = mdl.dal.get_use_case_associated_requirements(uc_id)
+        rows = self._rows
+        if rows is None:
+            rows = mdl.dal.get_use_case_requirement_tracking()
+        for uc_id, req_ids in rows:
             yield (uc_id, ', '.join(req_ids))
 
     def _get_caption_and_label(self):
         return ('Tracciamento requisiti -- casi d\'uso.', 'tab:ucreqtrack')
+
+
+class ReportPrinter(LaTeXPrinter):
+    """Prints in the target directory every table that the other printers can
+    produce (one for each requirement type and priority, the use case list and
+    the use case requirement tracking) plus a master document including them
+    all. The DB is read only once and the rows are then split among tables,
+    which can be printed concurrently by up to the given number of worker
+    processes, depending on how many rows the report has.
+    """
+    def __init__(self, target_dir_path, workers=1):
+        super(ReportPrinter, self).__init__(
+                os.path.join(target_dir_path, _REPORT_FILE_NAME))
+        self._target_dir_path = target_dir_path
+        self._workers = workers
+        self._table_names = []
+
+    def run(self):
+        """Prints all the tables and then the master document.
+        """
+        printers = self._create_printers()
+        self._table_names = [table_name for table_name, unused_printer
+                in printers]
+        rows = sum(printer.row_count for unused_table_name, printer
+                in printers)
+        render([printer for unused_table_name, printer in printers],
+                min(self._workers, rows // _ROWS_PER_WORKER))
+        super(ReportPrinter, self).run()
+
+    def _get_table_path(self, table_name):
+        """Returns the path of the file where the given table is printed.
+        """
+        return os.path.join(self._target_dir_path, table_name + '.tex')
+
+    def _create_printers(self):
+        """Reads all the information needed by the tables from the DB and
+        returns a list of (table name, printer) pairs, where each printer has
+        its own rows to print.
+        """
+        requirement_rows = dict(((req_type, priority), [])
+                for req_type in mdl.TYPE_LIST
+                for priority in mdl.PRIORITY_LIST)
+        for row in mdl.dal.get_all_requirement_table_rows():
+            # requirements with no (or an unknown) type or priority do not
+            # belong to any table, as it happens when printing a single one
+            rows = requirement_rows.get(row[:2])
+            if rows is not None:
+                rows.append(row[2:])
+        use_case_rows = []
+        tracking_rows = []
+        for row in mdl.dal.get_use_case_report_rows():
+            use_case_rows.append(row[:3])
+            tracking_rows.append((row[0], row[3]))
+        printers = []
+        for req_type in mdl.TYPE_LIST:
+            for priority in mdl.PRIORITY_LIST:
+                table_name = 'reqlist' + req_type + priority
+                printers.append((table_name, RequirementTablePrinter(req_type,
+                        priority, self._get_table_path(table_name),
+                        requirement_rows[(req_type, priority)])))
+        printers.append(('uclist', UseCaseTablePrinter(
+                self._get_table_path('uclist'), use_case_rows)))
+        printers.append(('ucreqtrack', UseCaseRequirementTrackPrinter(
+                self._get_table_path('ucreqtrack'), tracking_rows)))
+        return printers
+
+    def _generate_text(self):
+        for table_name in self._table_names:
+            yield '\\input{' + table_name + '}\n'
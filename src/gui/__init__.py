@@ -2,8 +2,12 @@
 
 """This package is intended to contain the UI code. It exposes a reference to
 the application main window which is needed by the controller at startup and in
-those cases when view updates must be triggered explicitly.
+those cases when view updates must be triggered explicitly, as well as the
+cache of the data of the items to display, which the controller invalidates
+when items change.
 """
 
 from src.gui.window import get_main_window
+from src.gui.loader import (get_display_cache, REQUIREMENT, USE_CASE, TEST,
+    SOURCE)
 from src.gui.res import resources
@@ -21,22 +21,33 @@ class ItemDisplay(QtGui.QWidget):
     """
     # signal used to inform the parent that some content has been modified
     content_changed = QtCore.Signal()
-    # signal used to inform the controller about new events
-    fire_event = QtCore.Signal(str, dict)
+    # signal used to inform the controller about the events of a save
+    fire_event_batch = QtCore.Signal(list)
 
-    def __init__(self, item=None, parent=None):
+    def __init__(self, item=None, parent=None, data=None):
         super(ItemDisplay, self).__init__(parent)
         self.item = item
+        # data needed to build the content which has already been loaded
+        self._data = data or {}
         self.setLayout(QtGui.QFormLayout(self))
         self._create_content()
 
+    def _get_data(self, key, loader):
+        """Returns a copy of the list preloaded under the given key or, if it
+        has not been preloaded, the list returned by the given loader.
+        """
+        if key in self._data:
+            return list(self._data[key])
+        return loader()
+
     def _create_content(self):
         """Creates the content of the widget (grid of label and input fields).
         """
         pass
 
     def save(self):
-        """Makes the data persistent by dispatching the correct events.
+        """Makes the data persistent by dispatching the correct events (all
+        together as a single batch).
         """
         pass
 
@@ -53,8 +64,8 @@ class ItemDisplay(QtGui.QWidget):
 class RequirementDisplay(ItemDisplay):
     """Widget which is used to display a requirement in the central area.
     """
-    def __init__(self, requirement, parent):
-        super(RequirementDisplay, self).__init__(requirement, parent)
+    def __init__(self, requirement, parent, data=None):
+        super(RequirementDisplay, self).__init__(requirement, parent, data)
 
     def _create_content(self):
         """Creates the form that is shown in the requirement display.
@@ -79,14 +90,15 @@ class RequirementDisplay(ItemDisplay):
                 mdl.TYPE_LIST.index(self.item.req_type))
         source_label = QtGui.QLabel(self.tr('Source'), self)
         self._source_input = QtGui.QComboBox(self)
-        sources = mdl.get_all_source_names()
+        sources = self._get_data('source_names', mdl.get_all_source_names)
         self._source_input.setModel(
                 QtGui.QStringListModel(sources))
         self._source_input.setCurrentIndex(
                 sources.index(self.item.source.name))
         parent_id_label = QtGui.QLabel(self.tr('Parent'), self)
         self._parent_id_input = QtGui.QComboBox(self)
-        requirement_ids = mdl.get_all_requirement_ids()
+        requirement_ids = self._get_data('requirement_ids',
+                mdl.get_all_requirement_ids)
         requirement_ids.insert(0, None)
         requirement_ids.remove(self.item.req_id)
         self._parent_id_input.setModel(QtGui.QStringListModel(requirement_ids))
@@ -126,9 +138,10 @@ class RequirementDisplay(ItemDisplay):
         self._uc_input.clicked.connect(self._handle_view_pressed)
 
     def save(self):
-        """Dispatches a series of events to inform the controller about those
+        """Dispatches a batch of events to inform the controller about those
         (and only those) changes that have been operated by the user.
         """
+        events = []
         new_req_id = self._name_input.text()
         new_description = self._description_input.toPlainText()
         new_priority = mdl.PRIORITY_LIST[self._priority_input.currentIndex()]
@@ -136,38 +149,39 @@ class RequirementDisplay(ItemDisplay):
         new_source = self._source_input.currentText()
         new_parent_id = self._parent_id_input.currentText() or None
         if self.item.req_id != new_req_id:
-            self.fire_event.emit('update_requirement_id',
-                    {'req_id': self.item.req_id, 'new_req_id': new_req_id})
+            events.append(('update_requirement_id',
+                    {'req_id': self.item.req_id, 'new_req_id': new_req_id}))
             self.item.req_id = new_req_id
         if self.item.description != new_description:
-            self.fire_event.emit('update_requirement_description',
+            events.append(('update_requirement_description',
                     {'req_id': new_req_id,
-                    'description': new_description})
+                    'description': new_description}))
         if self.item.priority != new_priority:
-            self.fire_event.emit('update_requirement_priority',
-                    {'req_id': new_req_id, 'priority': new_priority})
+            events.append(('update_requirement_priority',
+                    {'req_id': new_req_id, 'priority': new_priority}))
         if self.item.req_type != new_type:
-            self.fire_event.emit('update_requirement_type',
-                    {'req_id': new_req_id, 'req_type': new_type})
+            events.append(('update_requirement_type',
+                    {'req_id': new_req_id, 'req_type': new_type}))
         if self.item.source.name != new_source:
-            self.fire_event.emit('update_requirement_source',
-                    {'req_id': new_req_id, 'source_name': new_source})
+            events.append(('update_requirement_source',
+                    {'req_id': new_req_id, 'source_name': new_source}))
         if self.item.parent_id != new_parent_id:
-            self.fire_event.emit('update_requirement_parent_id',
-                    {'req_id': new_req_id, 'parent_id': new_parent_id})
+            events.append(('update_requirement_parent_id',
+                    {'req_id': new_req_id, 'parent_id': new_parent_id}))
         # these are performed always (changes will be detected later)
-        self.fire_event.emit('update_requirement_associations', {
+        events.append(('update_requirement_associations', {
                 'req_id': new_req_id, 'newly_associated_tests':
                 self._test_input.model().associated_item_ids,
                 'newly_associated_use_cases':
-                self._uc_input.model().associated_item_ids})
+                self._uc_input.model().associated_item_ids}))
+        self.fire_event_batch.emit(events)
 
 
 class UseCaseDisplay(ItemDisplay):
     """Widget which is used to display a use case in the central area.
     """
-    def __init__(self, use_case, parent):
-        super(UseCaseDisplay, self).__init__(use_case, parent)
+    def __init__(self, use_case, parent, data=None):
+        super(UseCaseDisplay, self).__init__(use_case, parent, data)
 
     def _create_content(self):
         """Creates the form that is shown in the use case display.
@@ -181,7 +195,7 @@ class UseCaseDisplay(ItemDisplay):
         self._description_input.setPlainText(self.item.description)
         parent_id_label = QtGui.QLabel(self.tr('Parent'), self)
         self._parent_id_input = QtGui.QComboBox(self)
-        uc_ids = mdl.get_all_use_case_ids()
+        uc_ids = self._get_data('use_case_ids', mdl.get_all_use_case_ids)
         uc_ids.insert(0, None)
         uc_ids.remove(self.item.uc_id)
         self._parent_id_input.setModel(QtGui.QStringListModel(uc_ids))
@@ -207,32 +221,34 @@ class UseCaseDisplay(ItemDisplay):
         self._requirements_input.clicked.connect(self._handle_view_pressed)
 
     def save(self):
-        """Dispatches a series of events to inform the controller about those
+        """Dispatches a batch of events to inform the controller about those
         (and only those) changes that have been operated by the user.
         """
+        events = []
         new_uc_id = self._name_input.text()
         new_description = self._description_input.toPlainText()
         new_parent_id = self._parent_id_input.currentText() or None
         if self.item.uc_id != new_uc_id:
-            self.fire_event.emit('update_use_case_id',
-                    {'uc_id': self.item.uc_id, 'new_uc_id': new_uc_id})
+            events.append(('update_use_case_id',
+                    {'uc_id': self.item.uc_id, 'new_uc_id': new_uc_id}))
             self.item.uc_id = new_uc_id
         if self.item.description != new_description:
-            self.fire_event.emit('update_use_case_description',
-                    {'uc_id': new_uc_id, 'description': new_description})
+            events.append(('update_use_case_description',
+                    {'uc_id': new_uc_id, 'description': new_description}))
         if self.item.parent_id != new_parent_id:
-            self.fire_event.emit('update_use_case_parent_id',
-                    {'uc_id': new_uc_id, 'parent_id': new_parent_id})
-        self.fire_event.emit('update_use_case_associations', {
+            events.append(('update_use_case_parent_id',
+                    {'uc_id': new_uc_id, 'parent_id': new_parent_id}))
+        events.append(('update_use_case_associations', {
                 'uc_id': new_uc_id, 'newly_associated_requirements':
-                self._requirements_input.model().associated_item_ids})
+                self._requirements_input.model().associated_item_ids}))
+        self.fire_event_batch.emit(events)
 
 
 class TestDisplay(ItemDisplay):
     """Widget which is used to display a test in the central area.
     """
-    def __init__(self, test, parent):
-        super(TestDisplay, self).__init__(test, parent)
+    def __init__(self, test, parent, data=None):
+        super(TestDisplay, self).__init__(test, parent, data)
 
     def _create_content(self):
         """Creates the form that is shown in the test display.
@@ -262,26 +278,28 @@ class TestDisplay(ItemDisplay):
         self._test_id_input.textChanged.connect(self.content_changed)
 
     def save(self):
-        """Dispatches a series of events to inform the controller about those
+        """Dispatches a batch of events to inform the controller about those
         (and only those) changes that have been operated by the user.
         """
+        events = []
         new_test_id = self._test_id_input.text()
         new_description = self._description_input.toPlainText()
         if self.item.test_id != new_test_id:
-            self.fire_event.emit('update_test_id',
-                    {'test_id': self.item.test_id, 'new_test_id': new_test_id})
+            events.append(('update_test_id', {'test_id': self.item.test_id,
+                    'new_test_id': new_test_id}))
             self.item.test_id = new_test_id
         if self.item.description != new_description:
-            self.fire_event.emit('update_test_description',
-                    {'test_id': new_test_id, 'description': new_description})
-        self.fire_event.emit('update_test_associations', {
+            events.append(('update_test_description',
+                    {'test_id': new_test_id, 'description': new_description}))
+        events.append(('update_test_associations', {
                 'test_id': new_test_id, 'newly_associated_requirements':
-                self._requirements_input.model().associated_item_ids})
+                self._requirements_input.model().associated_item_ids}))
+        self.fire_event_batch.emit(events)
 
 
 class SourceDisplay(ItemDisplay):
-    def __init__(self, source, parent):
-        super(SourceDisplay, self).__init__(source, parent)
+    def __init__(self, source, parent, data=None):
+        super(SourceDisplay, self).__init__(source, parent, data)
 
     def _create_content(self):
         # form fields
@@ -294,8 +312,24 @@ class SourceDisplay(ItemDisplay):
         self._name_input.textChanged.connect(self.content_changed)
 
     def save(self):
+        events = []
         new_source_name = self._name_input.text()
         if self.item.name != new_source_name:
-            self.fire_event.emit('update_source_name',
+            events.append(('update_source_name',
                     {'source_id': self.item.source_id,
-                    'source_name': new_source_name})
+                    'source_name': new_source_name}))
+        if events:
+            self.fire_event_batch.emit(events)
+
+
+class LoadingDisplay(ItemDisplay):
+    """Placeholder shown in the central area while the item to be displayed is
+    being loaded in the background.
+    """
+    def __init__(self, parent):
+        super(LoadingDisplay, self).__init__(parent=parent)
+
+    def _create_content(self):
+        """Creates a label informing the user that loading is in progress.
+        """
+        self.layout().addRow(QtGui.QLabel(self.tr('Loading...'), self))
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains what is needed to load the items shown in the central
+area in a worker thread, so that the window stays responsive while the user
+moves through the item views. Results are delivered back to the GUI thread
+through a signal, tagged with the number of the request they answer so that
+stale results can be told apart and dropped. The items next to the selected
+one are prefetched into a small cache, so that stepping through a tree does
+not pay the full loading cost at each step. What is loaded and how it is
+cached does not depend on Qt and lives in the model (see displaydata).
+"""
+
+from PySide import QtCore
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.model.displaydata import (REQUIREMENT, USE_CASE, TEST, SOURCE,
+    get_display_cache, load_display_data)
+
+
+class LoaderSignals(QtCore.QObject):
+    """Object emitting the results of the loaders, which must live in the GUI
+    thread (runnables are not QObjects and cannot emit signals themselves).
+    """
+    # emitted with the request number, the kind of item and the loaded data
+    loaded = QtCore.Signal(int, int, object)
+
+
+class DisplayLoader(QtCore.QRunnable):
+    """Runnable that loads the data of an item to be displayed, unless the
+    request has already become stale by the time it is started.
+    """
+    def __init__(self, signals, request, kind, item_id, is_current):
+        super(DisplayLoader, self).__init__()
+        self._signals = signals
+        self._request = request
+        self._kind = kind
+        self._item_id = item_id
+        self._is_current = is_current
+
+    def run(self):
+        """Loads the data, unless it is cached, and emits it (None if loading
+        failed).
+        """
+        if not self._is_current(self._request):
+            return
+        cache = get_display_cache()
+        data = cache.get(self._kind, self._item_id)
+        if data is None:
+            generation = cache.generation
+            try:
+                data = load_display_data(self._kind, self._item_id)
+            except SQLAlchemyError:
+                data = None
+            cache.store(self._kind, self._item_id, data, generation)
+        self._signals.loaded.emit(self._request, self._kind, data)
+
+
+class Prefetcher(QtCore.QRunnable):
+    """Runnable that loads the data of an item into the cache in advance, in
+    case the user is about to display it, unless the selection the item is a
+    neighbour of has already changed by the time it is started.
+    """
+    def __init__(self, request, kind, item_id, is_current):
+        super(Prefetcher, self).__init__()
+        self._request = request
+        self._kind = kind
+        self._item_id = item_id
+        self._is_current = is_current
+
+    def run(self):
+        """Loads the data into the cache, unless it is already there. The data
+        is not stored if the selection changes while it is being loaded, so
+        that it does not evict the entries of more relevant items.
+        """
+        if not self._is_current(self._request):
+            return
+        cache = get_display_cache()
+        if cache.contains(self._kind, self._item_id):
+            return
+        generation = cache.generation
+        try:
+            data = load_display_data(self._kind, self._item_id)
+        except SQLAlchemyError:
+            return
+        if self._is_current(self._request):
+            cache.store(self._kind, self._item_id, data, generation)
@@ -7,7 +7,7 @@ of its central (main) widget.
 from PySide import QtCore, QtGui
 
 from src import APPNAME, model as mdl
-from src.gui import dialogs as dlg, displays as dsp
+from src.gui import dialogs as dlg, displays as dsp, loader as ldr
 
 import os
 
@@ -17,6 +17,10 @@ _WINDOW_WIDTH = 900
 _WINDOW_HEIGHT = 500
 # maximum left column width
 _LEFT_COLUMN_WIDTH = 200
+# number of worker threads loading the items to be displayed
+_LOADER_THREADS = 2
+# priority of prefetching with respect to loading the selected item
+_PREFETCH_PRIORITY = -1
 # single instance of the application main window
 _mw = None
 
@@ -41,6 +45,8 @@ class MainWindow(QtGui.QMainWindow):
         # inserts the main widget in the window layout
         self._main_widget = MainWidget(self)
         self._main_widget.fire_event.connect(controller.handle_event)
+        self._main_widget.fire_event_batch.connect(
+                controller.handle_event_batch)
         self.setCentralWidget(self._main_widget)
         self.setMinimumSize(_WINDOW_WIDTH, _WINDOW_HEIGHT)
 
@@ -57,6 +63,10 @@ class MainWindow(QtGui.QMainWindow):
                 self.tr('Use case - requirements'), self)
         self._print_uc_req_track.triggered.connect(
                 self._handle_print_uc_req_track)
+        self._print_report_action = QtGui.QAction(
+                self.tr('Full report'), self)
+        self._print_report_action.triggered.connect(
+                self._handle_print_report)
 
     def _create_menus(self):
         print_menu = QtGui.QMenu(self.tr('Print'), self)
@@ -65,6 +75,8 @@ class MainWindow(QtGui.QMainWindow):
         track_menu = QtGui.QMenu(self.tr('Tracking'), print_menu)
         track_menu.addAction(self._print_uc_req_track)
         print_menu.addMenu(track_menu)
+        print_menu.addSeparator()
+        print_menu.addAction(self._print_report_action)
         self.menuBar().addMenu(print_menu)
 
     def display_message(self, message):
@@ -88,6 +100,14 @@ class MainWindow(QtGui.QMainWindow):
                     {'target_path': dialog.path, 'req_type': dialog.req_type,
                      'priority': dialog.priority})
 
+    @QtCore.Slot()
+    def _handle_print_report(self):
+        path = QtGui.QFileDialog.getExistingDirectory(self,
+                    self.tr('Select location'), os.path.expanduser('~'))
+        if path:
+            self._main_widget.fire_event.emit('print_report',
+                    {'target_path': path})
+
     @QtCore.Slot()
     def _handle_print_uc_req_track(self):
         ret = QtGui.QFileDialog.getSaveFileName(self,
@@ -103,10 +123,19 @@ class MainWidget(QtGui.QWidget):
     """
     # this signal is emitted to inform the controller about new events
     fire_event = QtCore.Signal(str, dict)
+    # this signal is emitted to inform the controller about batches of events
+    fire_event_batch = QtCore.Signal(list)
 
     def __init__(self, parent):
         super(MainWidget, self).__init__(parent)
         self.setLayout(QtGui.QVBoxLayout(self))
+        # items to be displayed are loaded in the background, results of any
+        # request but the last one (which has the highest number) are dropped
+        self._thread_pool = QtCore.QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(_LOADER_THREADS)
+        self._loader_signals = ldr.LoaderSignals(self)
+        self._loader_signals.loaded.connect(self._handle_display_loaded)
+        self._last_request = 0
         self._create_actions()
         self._create_toolbar()
         self._create_central_part()
@@ -193,6 +222,7 @@ class MainWidget(QtGui.QWidget):
             self._view.setModel(mdl.get_test_model())
         elif index == 3:
             self._view.setModel(mdl.get_source_model())
+        self._last_request += 1  # pending loads are no longer relevant
         self._switch_display(dsp.ItemDisplay(parent=self))
 
     @QtCore.Slot()
@@ -266,32 +296,70 @@ class MainWidget(QtGui.QWidget):
     @QtCore.Slot()
     def _handle_view_clicked(self):
         """Allows the central part to change its content depending on the
-        selection that has been made on the left hand column.
+        selection that has been made on the left hand column: a placeholder is
+        shown while the selected item is loaded in the background.
         """
         selection = self._get_view_selection()
         if len(selection) == 1:
-            item_id = selection.pop()
-            index = self._view_selector.currentIndex()
-            if index == 0:  # requirement
-                if mdl.get_all_source_names():
-                    requirement = mdl.get_requirement(item_id)
-                    self._switch_display(dsp.RequirementDisplay(
-                            requirement, self))
-                else:
-                    QtGui.QMessageBox.critical(self, self.tr('No source'),
-                            self.tr('You have to create at least one source'
-                            'in order to create a new requirement'))
-            elif index == 1:  # use case
-                use_case = mdl.get_use_case(item_id)
-                self._switch_display(dsp.UseCaseDisplay(use_case, self))
-            elif index == 2:  # test
-                test = mdl.get_test(item_id)
-                self._switch_display(dsp.TestDisplay(test, self))
-            elif index == 3:
-                source = mdl.get_source(item_id)
-                self._switch_display(dsp.SourceDisplay(source, self))
+            self._last_request += 1
+            self._switch_display(dsp.LoadingDisplay(self))
+            self._thread_pool.start(ldr.DisplayLoader(self._loader_signals,
+                    self._last_request, self._view_selector.currentIndex(),
+                    selection.pop(), self._is_request_current))
+            self._prefetch_neighbours()
+
+    def _prefetch_neighbours(self):
+        """Prefetches in the background the items which are likely to be
+        displayed next, i.e. the previous and next siblings of the selected
+        item and its first child (if its children have already been loaded).
+        Prefetches are dropped as soon as the selection changes again.
+        """
+        model = self._view.model()
+        kind = self._view_selector.currentIndex()
+        for index in self._view.selectedIndexes():
+            if index.column() != 0:
+                continue
+            neighbours = [index.sibling(index.row() - 1, 0),
+                    index.sibling(index.row() + 1, 0)]
+            if model.rowCount(index):
+                neighbours.append(model.index(0, 0, index))
+            for neighbour in neighbours:
+                if neighbour.isValid():
+                    self._thread_pool.start(ldr.Prefetcher(
+                            self._last_request, kind, model.data(neighbour),
+                            self._is_request_current), _PREFETCH_PRIORITY)
+
+    def _is_request_current(self, request):
+        """Tells whether the given load request is the last one that has been
+        made, which is the only one whose result is still wanted (this is also
+        called by the loaders, reading an integer is thread-safe).
+        """
+        return request == self._last_request
+
+    @QtCore.Slot(int, int, object)
+    def _handle_display_loaded(self, request, kind, data):
+        """Shows the display of a loaded item, unless the selection has moved
+        on since the item was requested.
+        """
+        if not self._is_request_current(request):
+            return
+        if data is None:
+            self._switch_display(dsp.ItemDisplay(parent=self))
+        elif kind == ldr.REQUIREMENT:
+            if data['source_names']:
+                self._switch_display(dsp.RequirementDisplay(data['item'],
+                        self, data))
             else:
                 self._switch_display(dsp.ItemDisplay(parent=self))
+                QtGui.QMessageBox.critical(self, self.tr('No source'),
+                        self.tr('You have to create at least one source'
+                        'in order to create a new requirement'))
+        elif kind == ldr.USE_CASE:
+            self._switch_display(dsp.UseCaseDisplay(data['item'], self, data))
+        elif kind == ldr.TEST:
+            self._switch_display(dsp.TestDisplay(data['item'], self, data))
+        else:
+            self._switch_display(dsp.SourceDisplay(data['item'], self, data))
 
     def _get_view_selection(self):
         """Extracts the selected item from the left hand column.
@@ -310,6 +378,6 @@ class MainWidget(QtGui.QWidget):
         self._display = new_display
         self._splitter.addWidget(self._display)
         # signal connections
-        new_display.fire_event.connect(self.fire_event)
+        new_display.fire_event_batch.connect(self.fire_event_batch)
         new_display.content_changed.connect(
                 self._handle_display_content_changed)
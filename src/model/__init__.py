@@ -13,9 +13,25 @@ from src.model.constants import TYPE_LIST, PRIORITY_LIST
 from src.model.dataaccess import (get_source, get_all_use_case_ids,
     get_all_test_ids, get_all_source_names, get_source_id, get_requirement,
     get_test, get_use_case, get_all_requirement_ids)
+# catalogs of item descriptions that the controller keeps up to date
+from src.model.catalog import (get_requirement_catalog, get_test_catalog,
+    get_use_case_catalog)
 # required by the controller at startup
 from src.model.database import initialize_db
-# these are needed to bind the views to their data model
-from src.model.qtbind import (get_requirement_model, get_use_case_model,
-    get_test_model, get_use_case_list_model, get_test_list_model,
-    get_requirement_list_model, get_source_model)
+# used to read the options set in the configuration file or the environment
+from src.model.database import get_setting
+# used by the controller to persist groups of changes atomically
+from src.model.database import begin_unit_of_work, end_unit_of_work
+# used to measure the SQL cost of the operations (when instrumentation is on)
+from src.model.database import sql_scope, get_sql_summary
+# these are needed to bind the views to their data model (PySide is optional
+# so that the data layer can also be used headless, e.g. by the benchmarks,
+# but any other import error must not go unnoticed)
+try:
+    import PySide as _pyside
+except ImportError:
+    _pyside = None
+if _pyside is not None:
+    from src.model.qtbind import (get_requirement_model, get_use_case_model,
+        get_test_model, get_use_case_list_model, get_test_list_model,
+        get_requirement_list_model, get_source_model)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""This module keeps a process-wide catalog of the IDs and descriptions of the
+requirements, use cases and tests, which is shared by all the list models used
+to associate items to each other. Each catalog is read from the DB the first
+time it is needed and is then kept up to date by the controller as items are
+created, renamed, described or deleted, so that no full-table reads are needed
+every time an item is displayed. Catalogs can be safely used by the threads
+loading displays in the background, even while the changes the controller
+is applying belong to a unit of work that has not been committed yet.
+"""
+
+import bisect
+import threading
+
+from src.model import dal, database as db
+
+
+# single instance of the requirement catalog
+_reqc = None
+# single instance of the test catalog
+_testc = None
+# single instance of the use case catalog
+_ucc = None
+# lock guarding the creation of the single instances
+_instance_lock = threading.Lock()
+
+
+class ItemCatalog(object):
+    """Sorted list of dictionaries having the 'id' and 'description' keys, one
+    for each item of a given kind, which is lazily loaded from the DB.
+    """
+    def __init__(self, loader):
+        self._loader = loader
+        self._entries = None
+        # item IDs in the same order as the entries, used for bisection
+        self._ids = None
+        # guards the entries, which may be loaded outside of the GUI thread
+        self._lock = threading.RLock()
+
+    @property
+    def entries(self):
+        """Returns a snapshot of the catalog as a list of dictionaries ordered
+        by ID, loading the catalog from the DB if needed.
+        """
+        with self._lock:
+            if self._entries is None:
+                self._entries = list(self._loader())
+                self._ids = [entry['id'] for entry in self._entries]
+            return list(self._entries)
+
+    def _find(self, item_id):
+        """Returns the position of the entry with the given ID or None if the
+        catalog has no such entry.
+        """
+        position = bisect.bisect_left(self._ids, item_id)
+        if position < len(self._ids) and self._ids[position] == item_id:
+            return position
+
+    def _defer_change(self):
+        """Leaves a change made before the catalog is loaded to the loader.
+        If the change belongs to a unit of work which is still open, another
+        thread may load the catalog before the unit is committed, missing the
+        change: the catalog is then reset when the unit ends.
+        """
+        if db.is_in_unit_of_work():
+            db.call_at_end_of_unit_of_work(self.reset)
+
+    def add(self, item_id, description):
+        """Inserts a new entry for the item with the given ID in its place (if
+        the catalog was loaded after the item was created, the entry is just
+        updated).
+        """
+        with self._lock:
+            if self._entries is None:  # it will be up to date once loaded
+                self._defer_change()
+                return
+            if self._find(item_id) is not None:
+                self.update_description(item_id, description)
+                return
+            position = bisect.bisect_left(self._ids, item_id)
+            self._ids.insert(position, item_id)
+            self._entries.insert(position,
+                    {'id': item_id, 'description': description})
+
+    def remove(self, item_id):
+        """Removes the entry of the item with the given ID, if present.
+        """
+        with self._lock:
+            if self._entries is None:
+                self._defer_change()
+                return
+            position = self._find(item_id)
+            if position is not None:
+                del self._ids[position]
+                del self._entries[position]
+
+    def rename(self, item_id, new_item_id):
+        """Moves the entry of the item with the given ID to the new ID.
+        """
+        with self._lock:
+            if self._entries is None:
+                self._defer_change()
+                return
+            position = self._find(item_id)
+            if position is not None:
+                description = self._entries[position]['description']
+                self.remove(item_id)
+                self.add(new_item_id, description)
+
+    def update_description(self, item_id, description):
+        """Changes the description stored for the item with the given ID.
+        """
+        with self._lock:
+            if self._entries is None:
+                self._defer_change()
+                return
+            position = self._find(item_id)
+            if position is not None:
+                self._entries[position] = {'id': item_id,
+                        'description': description}
+
+    def reset(self):
+        """Discards the content of the catalog so it is reloaded when needed.
+        """
+        with self._lock:
+            self._entries = None
+            self._ids = None
+
+
+def get_requirement_catalog():
+    """Returns a reference to the single instance of the requirement catalog.
+    """
+    global _reqc
+    with _instance_lock:
+        if not _reqc:
+            _reqc = ItemCatalog(dal.get_all_requirement_names_and_descriptions)
+    return _reqc
+
+
+def get_test_catalog():
+    """Returns a reference to the single instance of the test catalog.
+    """
+    global _testc
+    with _instance_lock:
+        if not _testc:
+            _testc = ItemCatalog(dal.get_all_test_names_and_descriptions)
+    return _testc
+
+
+def get_use_case_catalog():
+    """Returns a reference to the single instance of the use case catalog.
+    """
+    global _ucc
+    with _instance_lock:
+        if not _ucc:
+            _ucc = ItemCatalog(dal.get_all_uc_names_and_descriptions)
+    return _ucc
@@ -15,15 +15,23 @@ from src.model.dataaccess.requirement import (create_requirement,
     update_requirement_description, update_requirement_id,
     update_requirement_parent_id, update_requirement_priority,
     update_requirement_source, update_requirement_type,
-    get_all_requirement_ids_spec)
+    get_all_requirement_ids_spec, get_requirement_hierarchy,
+    get_requirement_children_summary, create_requirements,
+    get_requirement_table_rows, get_all_requirement_table_rows)
 from src.model.dataaccess.source import (create_source, delete_source,
     get_all_source_ids, get_all_source_names, get_source, get_source_id,
-    update_source_name)
+    update_source_name, create_sources)
 from src.model.dataaccess.test import (create_test, delete_test, get_test,
     update_test_description, update_test_id, get_all_test_ids,
-    get_all_test_names_and_descriptions, update_test_associations)
+    get_all_test_names_and_descriptions, update_test_associations,
+    create_tests)
 from src.model.dataaccess.usecase import (create_use_case, delete_use_case,
     get_all_use_case_ids, get_all_uc_names_and_descriptions, get_use_case,
     get_use_case_children_ids, get_top_level_use_case_ids, update_use_case_id,
     update_use_case_associations, update_use_case_description,
-    update_use_case_parent_id, get_use_case_associated_requirements)
+    update_use_case_parent_id, get_use_case_associated_requirements,
+    get_use_case_hierarchy, get_use_case_children_summary, create_use_cases,
+    get_use_case_table_rows, get_use_case_requirement_tracking,
+    get_use_case_report_rows)
+from src.model.dataaccess.records import (get_requirement_record,
+    get_use_case_record, get_test_record, get_source_record)
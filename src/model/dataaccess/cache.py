@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""This module provides a read-through cache for the query functions of the
+data access layer that the user interface calls over and over (e.g. the lists
+of IDs that fill combo boxes). Each cached function declares the tables its
+result depends on, and every write function bumps the version of the tables it
+changes: cached results are only returned while the versions of their tables
+are the ones they were read with. The cache can be disabled by setting the
+REQMANAGER_READ_CACHE environment variable to 0 or at runtime.
+"""
+
+import functools
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.model import database as db
+
+# environment variable that disables the cache when set to 0
+_CACHE_VARIABLE = 'REQMANAGER_READ_CACHE'
+# key of the session info where the tables written in a transaction are kept
+_WRITTEN_TABLES_KEY = 'written_tables'
+
+# whether cached functions return cached results
+_enabled = os.environ.get(_CACHE_VARIABLE, '1') != '0'
+# version of each table, increased every time the table is written
+_versions = {}
+# version of the whole cache, increased every time it is cleared
+_epoch = 0
+# cached results indexed by (function name, engine, arguments), each with the
+# versions of the tables it depends on at the time it was read (the engine
+# tells apart the results read from different DBs, see db.use_database)
+_entries = {}
+# number of calls answered with and without a cached result
+_hits = 0
+_misses = 0
+# lock guarding all the state of the cache
+_lock = threading.Lock()
+
+
+def _get_versions(tables):
+    """Returns the tuple of the current versions of the cache and of the given
+    tables (the lock must be held).
+    """
+    return (_epoch,) + tuple(_versions.get(table, 0) for table in tables)
+
+
+def _copy(result):
+    """Returns a copy of the given result if it is a list, so that callers can
+    change what they get without affecting the cache.
+    """
+    if isinstance(result, list):
+        return list(result)
+    return result
+
+
+def cached(*tables):
+    """Decorator that makes the decorated query function read-through cached,
+    its results depending on the content of the given tables. The cache is
+    bypassed within a unit of work, whose uncommitted changes must be visible
+    to its own reads but to no other thread.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args):
+            global _hits, _misses
+            if not _enabled or db.is_in_unit_of_work():
+                return function(*args)
+            key = (function.__name__, db.get_engine(), args)
+            with _lock:
+                versions = _get_versions(tables)
+                entry = _entries.get(key)
+                if entry is not None and entry[0] == versions:
+                    _hits += 1
+                    return _copy(entry[1])
+                _misses += 1
+            result = function(*args)
+            with _lock:
+                # tables written in the meantime may make the result stale
+                if _get_versions(tables) == versions:
+                    _entries[key] = (versions, result)
+            return _copy(result)
+        return wrapper
+    return decorator
+
+
+def bump(session, *tables):
+    """Invalidates the cached results depending on the given tables, which
+    are being written within the given session. They are invalidated again
+    when the session commits, since other threads may cache the old content
+    of the tables until then.
+    """
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+    session.info.setdefault(_WRITTEN_TABLES_KEY, set()).update(tables)
+
+
+def _handle_commit(session):
+    """Invalidates the results depending on the tables written by the session
+    which has just committed.
+    """
+    tables = session.info.pop(_WRITTEN_TABLES_KEY, ())
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+
+
+def _handle_rollback(session):
+    """Drops all the cached results after a rollback, since results read
+    within the rolled back transaction may reflect changes that were undone.
+    """
+    session.info.pop(_WRITTEN_TABLES_KEY, None)
+    clear()
+
+
+def clear():
+    """Drops all the cached results.
+    """
+    global _epoch
+    with _lock:
+        _epoch += 1
+        _entries.clear()
+
+
+def set_enabled(enabled):
+    """Enables or disables the cache, which is emptied in both cases.
+    """
+    global _enabled
+    _enabled = enabled
+    clear()
+
+
+def get_stats():
+    """Returns a dictionary with the number of hits and misses, the hit rate
+    and the number of cached results.
+    """
+    with _lock:
+        lookups = _hits + _misses
+        return {'hits': _hits, 'misses': _misses,
+                'hit_rate': float(_hits) / lookups if lookups else 0.0,
+                'entries': len(_entries)}
+
+
+event.listen(Session, 'after_commit', _handle_commit)
+event.listen(Session, 'after_rollback', _handle_rollback)
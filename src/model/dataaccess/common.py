@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+"""A set of helper functions shared by the data access modules, which operate
+within the session they are given and are not meant to be used outside of the
+data access layer.
+"""
+
+from sqlalchemy.orm.exc import NoResultFound
+
+
+# number of rows fetched at a time by the functions streaming query results
+STREAM_BATCH_SIZE = 500
+# maximum number of bound parameters used in a single IN clause (SQLite has a
+# limit on the number of host parameters a statement can have)
+_IN_CHUNK_SIZE = 500
+
+
+def get_existing_ids(session, column, ids):
+    """Returns the set of those IDs among the given ones which are the value of
+    the given (unique) mapped column for some row of its table.
+    """
+    ids = list(set(ids))
+    existing_ids = set()
+    for start in range(0, len(ids), _IN_CHUNK_SIZE):
+        chunk = ids[start:start + _IN_CHUNK_SIZE]
+        existing_ids.update(row[0] for row in
+                session.query(column).filter(column.in_(chunk)))
+    return existing_ids
+
+
+def ensure_existing(session, column, ids):
+    """Raises NoResultFound unless every one of the given IDs is the value of
+    the given (unique) mapped column for some row of its table.
+    """
+    ids = set(ids)
+    if len(get_existing_ids(session, column, ids)) != len(ids):
+        raise NoResultFound('No row was found for some of the given IDs')
+
+
+def insert_associations(session, table, column, other_column, pairs):
+    """Inserts in the given association table, whose columns are named after
+    the given mapped columns, a row for each of the given (ID, other ID) pairs
+    by executing a single-row INSERT statement for all the pairs at once
+    (executemany).
+    """
+    if pairs:
+        session.execute('INSERT INTO {0} ({1}, {2}) '
+                'VALUES (:item_id, :other_id)'.format(table, column.key,
+                other_column.key), [{'item_id': item_id, 'other_id': other_id}
+                for item_id, other_id in pairs])
+
+
+def validate_batch(session, column, records, parent_key=None,
+        associations=(), check=None):
+    """Validates a batch of records (dictionaries) representing new items to be
+    stored in the table of the given primary key column, keyed by the column
+    name. A record is rejected if its ID is missing, repeated or existing, if
+    the optional check function returns an error message for it, if any of the
+    IDs listed under the keys of the given (key, mapped column) associations
+    does not exist or if its parent (under the given key) is neither existing
+    nor a valid record of the batch. It returns the list of (row number,
+    record) pairs of the valid records and the list of (row number, error
+    message) pairs of the rejected ones.
+    """
+    errors = []
+    candidates = {}
+    for row, record in enumerate(records):
+        item_id = record.get(column.key)
+        if not item_id:
+            errors.append((row, 'Missing ID'))
+        elif item_id in candidates:
+            errors.append((row, 'Duplicate ID'))
+        else:
+            candidates[item_id] = (row, record)
+    for item_id in get_existing_ids(session, column, candidates):
+        errors.append((candidates.pop(item_id)[0], 'Existing ID'))
+    for key, other_column in associations:
+        existing_ids = get_existing_ids(session, other_column,
+                [other_id for row, record in candidates.values()
+                for other_id in record.get(key, ())])
+        for item_id, (row, record) in list(candidates.items()):
+            missing_ids = set(record.get(key, ())) - existing_ids
+            if missing_ids:
+                errors.append((row, 'Nonexistent associated items: ' +
+                        ', '.join(sorted(missing_ids))))
+                del candidates[item_id]
+    if check:
+        for item_id, (row, record) in list(candidates.items()):
+            message = check(record)
+            if message:
+                errors.append((row, message))
+                del candidates[item_id]
+    if parent_key:
+        for item_id, message in _validate_parents(session, column,
+                candidates, parent_key).items():
+            errors.append((candidates.pop(item_id)[0], message))
+    return sorted(candidates.values()), sorted(errors)
+
+
+def _validate_parents(session, column, candidates, parent_key):
+    """Given a dictionary mapping the IDs of candidate new items to the (row
+    number, record) pairs describing them, it returns a dictionary mapping the
+    IDs of those whose parent chain does not lead to an existing item (or to
+    no parent at all) to the corresponding error message.
+    """
+    existing_parent_ids = get_existing_ids(session, column,
+            [record.get(parent_key) for row, record in candidates.values()
+            if record.get(parent_key) and
+            record.get(parent_key) not in candidates])
+    outcomes = {}
+    for item_id in candidates:
+        path = []
+        current_id = item_id
+        while True:
+            if current_id in outcomes:
+                outcome = outcomes[current_id]
+                break
+            if current_id in path:
+                outcome = 'Cyclic parent'
+                break
+            path.append(current_id)
+            parent_id = candidates[current_id][1].get(parent_key)
+            if not parent_id or parent_id in existing_parent_ids:
+                outcome = None
+                break
+            if parent_id not in candidates:
+                outcome = 'Nonexistent parent'
+                break
+            current_id = parent_id
+        for path_id in path:
+            outcomes[path_id] = outcome
+    return dict((item_id, outcome) for item_id, outcome in outcomes.items()
+            if outcome)
+
+
+def update_associations(session, table, column, item_id, other_column,
+        newly_associated_ids):
+    """Makes the item with the given ID (in the given mapped column) linked to
+    exactly the items whose IDs (in the other mapped column) are given, within
+    the given association table, whose columns are named after the mapped
+    ones. It determines which entries must be added and which must be removed
+    and applies the differences with one executemany of an INSERT and one of a
+    DELETE statement at most, raising NoResultFound if any of the items
+    involved does not exist.
+    """
+    session.query(column).filter(column == item_id).one()
+    newly_associated_ids = set(newly_associated_ids)
+    associated_ids = set(row[0] for row in session.execute(
+            'SELECT {0} FROM {1} WHERE {2} = :item_id'.format(
+            other_column.key, table, column.key), {'item_id': item_id}))
+    ids_to_add = newly_associated_ids - associated_ids
+    ids_to_remove = associated_ids - newly_associated_ids
+    if ids_to_add:
+        ensure_existing(session, other_column, ids_to_add)
+        insert_associations(session, table, column, other_column,
+                [(item_id, other_id) for other_id in sorted(ids_to_add)])
+    if ids_to_remove:
+        session.execute('DELETE FROM {0} '
+                'WHERE {1} = :item_id AND {2} = :other_id'.format(table,
+                column.key, other_column.key),
+                [{'item_id': item_id, 'other_id': other_id}
+                for other_id in sorted(ids_to_remove)])
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""A set of functions returning the information about single items as
+immutable records built from Core selects, a lighter alternative to the
+detached transfer objects for read-only consumers. Associated items are
+represented as tuples of IDs, sorted.
+"""
+
+from collections import namedtuple
+
+from sqlalchemy.sql import select
+
+from src.model import database as db
+from src.model.mapping import Requirement, Source, SystemTest, UseCase
+
+
+RequirementRecord = namedtuple('RequirementRecord', ['req_id', 'description',
+        'req_type', 'priority', 'source_id', 'source_name', 'parent_id',
+        'use_cases', 'tests'])
+UseCaseRecord = namedtuple('UseCaseRecord', ['uc_id', 'description', 'image',
+        'parent_id', 'requirements'])
+TestRecord = namedtuple('TestRecord', ['test_id', 'description',
+        'requirements'])
+SourceRecord = namedtuple('SourceRecord', ['source_id', 'name'])
+
+# tables mapping the many-to-many relationships
+_uc_req = db.MappedBase.metadata.tables['UseCasesRequirements']
+_req_test = db.MappedBase.metadata.tables['RequirementsTests']
+
+
+def _get_associated_ids(session, id_column, filter_column, item_id):
+    """Returns the sorted tuple of the values of the given column in the rows
+    of an association table where the other column matches the given ID.
+    """
+    return tuple(row[0] for row in session.execute(select([id_column]).where(
+            filter_column == item_id).order_by(id_column)))
+
+
+def get_requirement_record(req_id):
+    """Returns the record of the requirement with the given ID (None if there
+    is no such requirement).
+    """
+    requirements = Requirement.__table__
+    sources = Source.__table__
+    with db.get_session() as session:
+        row = session.execute(select([requirements.c.req_id,
+                requirements.c.description, requirements.c.req_type,
+                requirements.c.priority, requirements.c.source_id,
+                sources.c.name, requirements.c.parent_id]).select_from(
+                requirements.outerjoin(sources, requirements.c.source_id ==
+                sources.c.source_id)).where(
+                requirements.c.req_id == req_id)).first()
+        if row is None:
+            return None
+        return RequirementRecord(*(tuple(row) + (
+                _get_associated_ids(session, _uc_req.c.uc_id,
+                _uc_req.c.req_id, req_id),
+                _get_associated_ids(session, _req_test.c.test_id,
+                _req_test.c.req_id, req_id))))
+
+
+def get_use_case_record(uc_id):
+    """Returns the record of the use case with the given ID (None if there is
+    no such use case).
+    """
+    use_cases = UseCase.__table__
+    with db.get_session() as session:
+        row = session.execute(select([use_cases.c.uc_id,
+                use_cases.c.description, use_cases.c.image,
+                use_cases.c.parent_id]).where(
+                use_cases.c.uc_id == uc_id)).first()
+        if row is None:
+            return None
+        return UseCaseRecord(*(tuple(row) + (_get_associated_ids(session,
+                _uc_req.c.req_id, _uc_req.c.uc_id, uc_id),)))
+
+
+def get_test_record(test_id):
+    """Returns the record of the test with the given ID (None if there is no
+    such test).
+    """
+    tests = SystemTest.__table__
+    with db.get_session() as session:
+        row = session.execute(select([tests.c.test_id,
+                tests.c.description]).where(
+                tests.c.test_id == test_id)).first()
+        if row is None:
+            return None
+        return TestRecord(*(tuple(row) + (_get_associated_ids(session,
+                _req_test.c.req_id, _req_test.c.test_id, test_id),)))
+
+
+def get_source_record(source_id):
+    """Returns the record of the source with the given ID (None if there is no
+    such source).
+    """
+    sources = Source.__table__
+    with db.get_session() as session:
+        row = session.execute(select([sources.c.source_id,
+                sources.c.name]).where(
+                sources.c.source_id == source_id)).first()
+        if row is None:
+            return None
+        return SourceRecord(*row)
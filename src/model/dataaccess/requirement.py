@@ -3,7 +3,11 @@
 """A set of functions to perform CRUD operations on system requirements.
 """
 
+from sqlalchemy import func
+from sqlalchemy.orm import aliased, joinedload, selectinload
+
 from src.model import database as db
+from src.model.dataaccess import cache, common
 from src.model.constants import PRIORITY_LIST, TYPE_LIST
 from src.model.mapping import UseCase, Requirement, Source, SystemTest
 
@@ -15,15 +19,67 @@ def create_requirement(req_id, description, req_type, priority, source_id,
     if parent_id and not _is_requirement_existing(parent_id):
         raise Exception('Nonexistent parent')
     with db.get_session() as session:
+        cache.bump(session, 'Requirements')
         requirement = Requirement(req_id, description, req_type, priority,
                 source_id, parent_id)
         session.add(requirement)
 
 
+def create_requirements(records):
+    """Creates in a single transaction the requirements described by the given
+    iterable of dictionaries, having the same keys as the arguments of
+    create_requirement plus the optional 'use_cases' and 'tests' lists of IDs
+    of the items to associate. Parents can be either existing requirements or
+    other requirements of the batch. Invalid records are skipped and a list of
+    (row number, error message) pairs describing them is returned.
+    """
+    records = list(records)
+    with db.get_session() as session:
+        cache.bump(session, 'Requirements', 'UseCasesRequirements',
+                'RequirementsTests')
+        source_ids = common.get_existing_ids(session, Source.source_id,
+                [record['source_id'] for record in records
+                if record.get('source_id') is not None])
+
+        def check(record):
+            """Checks the fields of a requirement that have a closed domain.
+            """
+            if record.get('req_type') not in TYPE_LIST:
+                return 'Invalid type'
+            if record.get('priority') not in PRIORITY_LIST:
+                return 'Invalid priority'
+            if (record.get('source_id') is not None and
+                    record.get('source_id') not in source_ids):
+                return 'Nonexistent source'
+        records, errors = common.validate_batch(session, Requirement.req_id,
+                records, 'parent_id', [('use_cases', UseCase.uc_id),
+                ('tests', SystemTest.test_id)], check)
+        if records:
+            session.execute(Requirement.__table__.insert(),
+                    [{'req_id': record['req_id'],
+                    'description': record.get('description'),
+                    'req_type': record['req_type'],
+                    'priority': record['priority'],
+                    'source_id': record.get('source_id'),
+                    'parent_id': record.get('parent_id')}
+                    for row, record in records])
+        common.insert_associations(session, 'UseCasesRequirements',
+                Requirement.req_id, UseCase.uc_id,
+                [(record['req_id'], uc_id) for row, record in records
+                for uc_id in set(record.get('use_cases', ()))])
+        common.insert_associations(session, 'RequirementsTests',
+                Requirement.req_id, SystemTest.test_id,
+                [(record['req_id'], test_id) for row, record in records
+                for test_id in set(record.get('tests', ()))])
+        return errors
+
+
 def delete_requirement(req_id):
     """Deletes the requirement with the given ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'Requirements', 'UseCasesRequirements',
+                'RequirementsTests')
         session.query(Requirement).filter(
                 Requirement.req_id == req_id).delete()
         session.execute('UPDATE Requirements SET parent_id = NULL '
@@ -34,6 +90,7 @@ def delete_requirement(req_id):
                 'WHERE req_id = :req_id', {'req_id': req_id})
 
 
+@cache.cached('Requirements')
 def get_all_requirement_ids():
     """Extracts the IDs of all the requirements that have been saved.
     """
@@ -63,15 +120,30 @@ def get_all_requirement_names_and_descriptions():
 
 
 def get_requirement(req_id):
-    """Converts a requirement ID to the given transfer object.
+    """Converts a requirement ID to the given transfer object, loading all
+    its relationships since it is detached before being returned (the source
+    comes with the same query, associations with one more query each).
     """
     with db.get_session() as session:
-        requirement = session.query(Requirement).filter(
+        requirement = session.query(Requirement).options(
+                joinedload(Requirement.source),
+                selectinload(Requirement.use_cases),
+                selectinload(Requirement.tests)).filter(
                 Requirement.req_id == req_id).scalar()
         session.expunge_all()
         return requirement
 
 
+def get_requirement_hierarchy():
+    """Returns a list of (ID, parent ID) pairs, ordered by ID, describing the
+    whole requirement forest so that it can be rebuilt with a single query.
+    """
+    with db.get_session() as session:
+        return [(req[0], req[1]) for req in
+                session.query(Requirement.req_id,
+                Requirement.parent_id).order_by(Requirement.req_id)]
+
+
 def get_requirement_children_ids(req_id):
     """Returns a list of IDs corresponding to the children of the requirement
     with the given ID.
@@ -82,6 +154,56 @@ def get_requirement_children_ids(req_id):
                 Requirement.parent_id == req_id).order_by(Requirement.req_id)]
 
 
+def _query_requirement_table_rows(session):
+    """Returns a query for the (type, priority, ID, description, source name,
+    parent ID) tuples of the requirements, ordered by ID, which joins
+    requirements and sources.
+    """
+    return session.query(Requirement.req_type, Requirement.priority,
+            Requirement.req_id, Requirement.description, Source.name,
+            Requirement.parent_id).outerjoin(Source,
+            Source.source_id == Requirement.source_id).order_by(
+            Requirement.req_id)
+
+
+def get_all_requirement_table_rows():
+    """Yields, ordered by ID, a (type, priority, ID, description, source name,
+    parent ID) tuple for each requirement, streaming the results of a single
+    query joining requirements and sources.
+    """
+    with db.get_session() as session:
+        for row in _query_requirement_table_rows(session).yield_per(
+                common.STREAM_BATCH_SIZE):
+            yield tuple(row)
+
+
+def get_requirement_table_rows(req_type, priority):
+    """Yields, ordered by ID, an (ID, description, source name, parent ID)
+    tuple for each requirement having the given type and priority, streaming
+    the results of a single query joining requirements and sources.
+    """
+    with db.get_session() as session:
+        for row in _query_requirement_table_rows(session).filter(
+                Requirement.req_type == req_type,
+                Requirement.priority == priority).yield_per(
+                common.STREAM_BATCH_SIZE):
+            yield tuple(row)[2:]
+
+
+def get_requirement_children_summary(req_id=None):
+    """Returns a list of (ID, number of children) pairs, ordered by ID, for the
+    children of the requirement with the given ID or, if the ID is None, for
+    the top-level requirements.
+    """
+    child = aliased(Requirement)
+    with db.get_session() as session:
+        return [(req[0], req[1]) for req in
+                session.query(Requirement.req_id, func.count(child.req_id))
+                .outerjoin(child, child.parent_id == Requirement.req_id)
+                .filter(Requirement.parent_id == req_id)
+                .group_by(Requirement.req_id).order_by(Requirement.req_id)]
+
+
 def get_top_level_requirement_ids():
     """Returns the list of all those IDs that correspond to top-level
     requirements, i.e. requirements having no parent.
@@ -112,38 +234,20 @@ def update_requirement_associations(req_id, newly_associated_use_cases,
     its content accordingly.
     """
     with db.get_session() as session:
-        requirement = session.query(Requirement).filter(
-                Requirement.req_id == req_id).one()
-        # handle use cases
-        newly_associated_use_cases = set(newly_associated_use_cases)
-        associated_use_cases = set([uc.uc_id for uc in requirement.use_cases])
-        ids_to_add = newly_associated_use_cases - associated_use_cases
-        ids_to_remove = associated_use_cases - newly_associated_use_cases
-        for uc_id in ids_to_add:
-            uc = session.query(UseCase).filter(UseCase.uc_id == uc_id).one()
-            requirement.use_cases.append(uc)
-        for uc_id in ids_to_remove:
-            uc = session.query(UseCase).filter(UseCase.uc_id == uc_id).one()
-            requirement.use_cases.remove(uc)
-        # handle tests
-        newly_associated_tests = set(newly_associated_tests)
-        associated_tests = set([test.test_id for test in requirement.tests])
-        ids_to_add = newly_associated_tests - associated_tests
-        ids_to_remove = associated_tests - newly_associated_tests
-        for test_id in ids_to_add:
-            test = session.query(SystemTest).filter(
-                    SystemTest.test_id == test_id).one()
-            requirement.tests.append(test)
-        for test_id in ids_to_remove:
-            test = session.query(SystemTest).filter(
-                    SystemTest.test_id == test_id).one()
-            requirement.tests.remove(test)
+        cache.bump(session, 'UseCasesRequirements', 'RequirementsTests')
+        common.update_associations(session, 'UseCasesRequirements',
+                Requirement.req_id, req_id, UseCase.uc_id,
+                newly_associated_use_cases)
+        common.update_associations(session, 'RequirementsTests',
+                Requirement.req_id, req_id, SystemTest.test_id,
+                newly_associated_tests)
 
 
 def update_requirement_description(req_id, description):
     """Updates the description of the requirement with the given ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'Requirements')
         requirement = session.query(Requirement).filter(
                 Requirement.req_id == req_id).one()
         requirement.description = description
@@ -154,6 +258,8 @@ def update_requirement_id(req_id, new_req_id):
     change in the association tables if needed.
     """
     with db.get_session() as session:
+        cache.bump(session, 'Requirements', 'UseCasesRequirements',
+                'RequirementsTests')
         requirement = session.query(Requirement).filter(
                 Requirement.req_id == req_id).one()
         requirement.req_id = new_req_id
@@ -172,6 +278,7 @@ def update_requirement_parent_id(req_id, parent_id):
     """Assigns a new parent to the requirement with the given ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'Requirements')
         requirement = session.query(Requirement).filter(
                 Requirement.req_id == req_id).one()
         requirement.parent_id = parent_id
@@ -182,6 +289,7 @@ def update_requirement_priority(req_id, priority):
     """
     assert priority in PRIORITY_LIST
     with db.get_session() as session:
+        cache.bump(session, 'Requirements')
         requirement = session.query(Requirement).filter(
                 Requirement.req_id == req_id).one()
         requirement.priority = priority
@@ -191,6 +299,7 @@ def update_requirement_source(req_id, source_name):
     """Updates the source of the requirement with the given ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'Requirements')
         requirement = session.query(Requirement).filter(
                 Requirement.req_id == req_id).one()
         source = session.query(Source).filter(Source.name == source_name).one()
@@ -202,6 +311,7 @@ def update_requirement_type(req_id, req_type):
     """
     assert req_type in TYPE_LIST
     with db.get_session() as session:
+        cache.bump(session, 'Requirements')
         requirement = session.query(Requirement).filter(
                 Requirement.req_id == req_id).one()
         requirement.req_type = req_type
@@ -4,6 +4,7 @@
 """
 
 from src.model import database as db
+from src.model.dataaccess import cache, common
 from src.model.mapping import Source
 
 
@@ -11,17 +12,36 @@ def create_source(source_name):
     """Creates a new requirement source with the given name.
     """
     with db.get_session() as session:
+        cache.bump(session, 'Sources')
         source = Source(source_name)
         session.add(source)
 
 
+def create_sources(source_names):
+    """Creates in a single transaction a requirement source for each one of the
+    given names. Names that are empty, repeated or already in use are skipped
+    and a list of (row number, error message) pairs describing them is
+    returned.
+    """
+    with db.get_session() as session:
+        cache.bump(session, 'Sources')
+        records, errors = common.validate_batch(session, Source.name,
+                [{'name': name} for name in source_names])
+        if records:
+            session.execute(Source.__table__.insert(),
+                    [{'name': record['name']} for row, record in records])
+        return errors
+
+
 def delete_source(source_id):
     """Deletes the requirement source with the given ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'Sources', 'Requirements')
         session.query(Source).filter(Source.source_id == source_id).delete()
 
 
+@cache.cached('Sources')
 def get_all_source_ids():
     """Returns a list of all the source IDs that are used in the system.
     """
@@ -29,6 +49,7 @@ def get_all_source_ids():
         return [s[0] for s in session.query(Source.source_id)]
 
 
+@cache.cached('Sources')
 def get_all_source_names():
     """Returns a list of all the names of the sources used in the system.
     """
@@ -46,6 +67,7 @@ def get_source(source_id):
         return source
 
 
+@cache.cached('Sources')
 def get_source_id(source_name):
     """Converts between a source name and a source ID (possible because
     names are under a unique constraint and can be used as super-keys).
@@ -59,6 +81,7 @@ def update_source_name(source_id, source_name):
     """Changes to the given source name the source with the given ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'Sources')
         source = session.query(Source).filter(
                 Source.source_id == source_id).one()
         source.name = source_name
@@ -3,7 +3,10 @@
 """A set of functions to perform CRUD operations on system tests.
 """
 
+from sqlalchemy.orm import selectinload
+
 from src.model import database as db
+from src.model.dataaccess import cache, common
 from src.model.mapping import SystemTest, Requirement
 
 
@@ -11,21 +14,48 @@ def create_test(test_id, description):
     """Creates a new system test with the given ID and description.
     """
     with db.get_session() as session:
+        cache.bump(session, 'SystemTests')
         test = SystemTest(test_id, description)
         session.add(test)
 
 
+def create_tests(records):
+    """Creates in a single transaction the system tests described by the given
+    iterable of dictionaries, having the same keys as the arguments of
+    create_test plus the optional 'requirements' list of IDs of the
+    requirements to associate. Invalid records are skipped and a list of (row
+    number, error message) pairs describing them is returned.
+    """
+    with db.get_session() as session:
+        cache.bump(session, 'SystemTests', 'RequirementsTests')
+        records, errors = common.validate_batch(session, SystemTest.test_id,
+                list(records), associations=[('requirements',
+                Requirement.req_id)])
+        if records:
+            session.execute(SystemTest.__table__.insert(),
+                    [{'test_id': record['test_id'],
+                    'description': record.get('description')}
+                    for row, record in records])
+        common.insert_associations(session, 'RequirementsTests',
+                SystemTest.test_id, Requirement.req_id,
+                [(record['test_id'], req_id) for row, record in records
+                for req_id in set(record.get('requirements', ()))])
+        return errors
+
+
 def delete_test(test_id):
     """Deletes the test with the given test ID, removing also all the entries
     from the association table linking tests and requirements.
     """
     with db.get_session() as session:
+        cache.bump(session, 'SystemTests', 'RequirementsTests')
         session.query(SystemTest).filter(
                 SystemTest.test_id == test_id).delete()
         session.execute('DELETE FROM RequirementsTests '
                 'WHERE test_id = :test_id', {'test_id': test_id})
 
 
+@cache.cached('SystemTests')
 def get_all_test_ids():
     """Returns a list of the IDsof all tests.
     """
@@ -48,7 +78,8 @@ def get_test(test_id):
     """Converts a test ID to the corresponding (detached) transfer object.
     """
     with db.get_session() as session:
-        test = session.query(SystemTest).filter(
+        test = session.query(SystemTest).options(
+                selectinload(SystemTest.requirements)).filter(
                 SystemTest.test_id == test_id).scalar()
         session.expunge_all()
         return test
@@ -61,29 +92,17 @@ def update_test_associations(test_id, newly_associated_requirements):
     the association table and updates its content accordingly.
     """
     with db.get_session() as session:
-        test = session.query(SystemTest).filter(
-                SystemTest.test_id == test_id).one()
-        newly_associated_requirements = set(newly_associated_requirements)
-        associated_requirements = set([req.req_id
-                for req in test.requirements])
-        # determines entries to add
-        ids_to_add = newly_associated_requirements - associated_requirements
-        for req_id in ids_to_add:
-            req = session.query(Requirement).filter(
-                    Requirement.req_id == req_id).one()
-            test.requirements.append(req)
-        # determines entries to remove
-        ids_to_remove = associated_requirements - newly_associated_requirements
-        for req_id in ids_to_remove:
-            req = session.query(Requirement).filter(
-                    Requirement.req_id == req_id).one()
-            test.requirements.remove(req)
+        cache.bump(session, 'RequirementsTests')
+        common.update_associations(session, 'RequirementsTests',
+                SystemTest.test_id, test_id, Requirement.req_id,
+                newly_associated_requirements)
 
 
 def update_test_description(test_id, description):
     """Updates the description of the test with the given ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'SystemTests')
         test = session.query(SystemTest).filter(
                 SystemTest.test_id == test_id).one()
         test.description = description
@@ -94,6 +113,7 @@ def update_test_id(test_id, new_test_id):
     provided new ID conflicts with the one some other already existing test.
     """
     with db.get_session() as session:
+        cache.bump(session, 'SystemTests', 'RequirementsTests')
         test = session.query(SystemTest).filter(
                 SystemTest.test_id == test_id).one()
         test.test_id = new_test_id
@@ -3,7 +3,13 @@
 """A set of functions to perform CRUD operations on system use cases.
 """
 
+from itertools import groupby
+
+from sqlalchemy import func
+from sqlalchemy.orm import aliased, selectinload
+
 from src.model import database as db
+from src.model.dataaccess import cache, common
 from src.model.mapping import UseCase, Requirement
 
 
@@ -13,14 +19,43 @@ def create_use_case(uc_id, description, image=None, parent_id=None):
     if parent_id and not _is_uc_existing(parent_id):
         raise Exception('Nonexistent parent')
     with db.get_session() as session:
+        cache.bump(session, 'UseCases')
         uc = UseCase(uc_id, description, image, parent_id)
         session.add(uc)
 
 
+def create_use_cases(records):
+    """Creates in a single transaction the use cases described by the given
+    iterable of dictionaries, having the same keys as the arguments of
+    create_use_case plus the optional 'requirements' list of IDs of the
+    requirements to associate. Parents can be either existing use cases or
+    other use cases of the batch. Invalid records are skipped and a list of
+    (row number, error message) pairs describing them is returned.
+    """
+    with db.get_session() as session:
+        cache.bump(session, 'UseCases', 'UseCasesRequirements')
+        records, errors = common.validate_batch(session, UseCase.uc_id,
+                list(records), 'parent_id',
+                [('requirements', Requirement.req_id)])
+        if records:
+            session.execute(UseCase.__table__.insert(),
+                    [{'uc_id': record['uc_id'],
+                    'description': record.get('description'),
+                    'image': record.get('image'),
+                    'parent_id': record.get('parent_id')}
+                    for row, record in records])
+        common.insert_associations(session, 'UseCasesRequirements',
+                UseCase.uc_id, Requirement.req_id,
+                [(record['uc_id'], req_id) for row, record in records
+                for req_id in set(record.get('requirements', ()))])
+        return errors
+
+
 def delete_use_case(uc_id):
     """Deletes the use case with the given ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'UseCases', 'UseCasesRequirements')
         session.query(UseCase).filter(UseCase.uc_id == uc_id).delete()
         session.execute('UPDATE UseCases SET parent_id = NULL '
                 'WHERE parent_id = :uc_id', {'uc_id': uc_id})
@@ -28,6 +63,7 @@ def delete_use_case(uc_id):
                 'WHERE uc_id = :uc_id', {'uc_id': uc_id})
 
 
+@cache.cached('UseCases')
 def get_all_use_case_ids():
     """Returns a list of all the registered use case IDs.
     """
@@ -46,10 +82,13 @@ def get_all_uc_names_and_descriptions():
 
 
 def get_use_case(uc_id):
-    """Converts the given use case ID to the corresponding transfer object.
+    """Converts the given use case ID to the corresponding transfer object,
+    loading its requirements (with a second query) before detaching it.
     """
     with db.get_session() as session:
-        uc = session.query(UseCase).filter(UseCase.uc_id == uc_id).scalar()
+        uc = session.query(UseCase).options(
+                selectinload(UseCase.requirements)).filter(
+                UseCase.uc_id == uc_id).scalar()
         session.expunge_all()
         return uc
 
@@ -59,8 +98,46 @@ def get_use_case_associated_requirements(uc_id):
     use case with the given ID.
     """
     with db.get_session() as session:
-        uc = session.query(UseCase).filter(UseCase.uc_id == uc_id).one()
-        return [r.req_id for r in uc.requirements]
+        common.ensure_existing(session, UseCase.uc_id, [uc_id])
+        return [req[0] for req in session.query(Requirement.req_id).join(
+                Requirement.use_cases).filter(UseCase.uc_id == uc_id)]
+
+
+def get_use_case_report_rows():
+    """Yields, ordered by ID, an (ID, description, parent ID, list of
+    associated requirement IDs) tuple for each use case, streaming the results
+    of a single query joining the use cases with the association table.
+    """
+    with db.get_session() as session:
+        rows = session.execute('SELECT UseCases.uc_id, '
+                'UseCases.description, UseCases.parent_id, '
+                'UseCasesRequirements.req_id FROM UseCases '
+                'LEFT OUTER JOIN UseCasesRequirements '
+                'ON UseCasesRequirements.uc_id = UseCases.uc_id '
+                'ORDER BY UseCases.uc_id, UseCasesRequirements.req_id')
+        for uc_id, group in groupby(rows, lambda row: row[0]):
+            group = list(group)
+            yield (uc_id, group[0][1], group[0][2],
+                   [row[3] for row in group if row[3] is not None])
+
+
+def get_use_case_requirement_tracking():
+    """Yields, ordered by use case ID, a (use case ID, list of requirement IDs)
+    pair for each use case, streaming the results of a single query.
+    """
+    for row in get_use_case_report_rows():
+        yield (row[0], row[3])
+
+
+def get_use_case_table_rows():
+    """Yields, ordered by ID, an (ID, description, parent ID) tuple for each
+    use case, streaming the results of a single query.
+    """
+    with db.get_session() as session:
+        for row in session.query(UseCase.uc_id, UseCase.description,
+                UseCase.parent_id).order_by(UseCase.uc_id).yield_per(
+                common.STREAM_BATCH_SIZE):
+            yield tuple(row)
 
 
 def get_top_level_use_case_ids():
@@ -73,6 +150,20 @@ def get_top_level_use_case_ids():
                 UseCase.parent_id == None).order_by(UseCase.uc_id)]
 
 
+def get_use_case_children_summary(uc_id=None):
+    """Returns a list of (ID, number of children) pairs, ordered by ID, for the
+    children of the use case with the given ID or, if the ID is None, for the
+    top level use cases.
+    """
+    child = aliased(UseCase)
+    with db.get_session() as session:
+        return [(uc[0], uc[1]) for uc in
+                session.query(UseCase.uc_id, func.count(child.uc_id))
+                .outerjoin(child, child.parent_id == UseCase.uc_id)
+                .filter(UseCase.parent_id == uc_id)
+                .group_by(UseCase.uc_id).order_by(UseCase.uc_id)]
+
+
 def get_use_case_children_ids(uc_id):
     """Returns the list of use case ID corresponding to the children of the
     use case with the given ID (empty list if it has no children at all).
@@ -83,6 +174,16 @@ def get_use_case_children_ids(uc_id):
                 UseCase.parent_id == uc_id).order_by(UseCase.uc_id)]
 
 
+def get_use_case_hierarchy():
+    """Returns a list of (ID, parent ID) pairs, ordered by ID, describing the
+    whole use case forest so that it can be rebuilt with a single query.
+    """
+    with db.get_session() as session:
+        return [(uc[0], uc[1]) for uc in
+                session.query(UseCase.uc_id,
+                UseCase.parent_id).order_by(UseCase.uc_id)]
+
+
 def _is_uc_existing(uc_id):
     """Returns True if a use case with the given ID has already been saved,
     False otherwise.
@@ -99,27 +200,17 @@ def update_use_case_associations(uc_id, newly_associated_requirements):
     the association table and updates its content accordingly.
     """
     with db.get_session() as session:
-        uc = session.query(UseCase).filter(UseCase.uc_id == uc_id).one()
-        newly_associated_requirements = set(newly_associated_requirements)
-        associated_requirements = set([req.req_id for req in uc.requirements])
-        # determines entries to be added
-        ids_to_add = newly_associated_requirements - associated_requirements
-        for req_id in ids_to_add:
-            req = session.query(Requirement).filter(
-                    Requirement.req_id == req_id).one()
-            uc.requirements.append(req)
-        # determines entries to be removed
-        ids_to_remove = associated_requirements - newly_associated_requirements
-        for req_id in ids_to_remove:
-            req = session.query(Requirement).filter(
-                    Requirement.req_id == req_id).one()
-            uc.requirements.remove(req)
+        cache.bump(session, 'UseCasesRequirements')
+        common.update_associations(session, 'UseCasesRequirements',
+                UseCase.uc_id, uc_id, Requirement.req_id,
+                newly_associated_requirements)
 
 
 def update_use_case_description(uc_id, description):
     """Updates the description of the use case with the given ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'UseCases')
         uc = session.query(UseCase).filter(UseCase.uc_id == uc_id).one()
         uc.description = description
 
@@ -129,6 +220,7 @@ def update_use_case_id(uc_id, new_uc_id):
     operation cannot be performed due to primary key conflicts.
     """
     with db.get_session() as session:
+        cache.bump(session, 'UseCases', 'UseCasesRequirements')
         uc = session.query(UseCase).filter(UseCase.uc_id == uc_id).one()
         uc.uc_id = new_uc_id
         session.execute('UPDATE UseCasesRequirements '
@@ -144,5 +236,6 @@ def update_use_case_parent_id(uc_id, parent_id):
     to the given parent ID.
     """
     with db.get_session() as session:
+        cache.bump(session, 'UseCases')
         uc = session.query(UseCase).filter(UseCase.uc_id == uc_id).one()
         uc.parent_id = parent_id
@@ -3,15 +3,31 @@
 """This module is responsible for providing an easy-to-use interface to the
 data persistence layer of the application. It contains the base class which
 all ORM classes must inherit, a function to initialize the database and the
-access point to all database sessions.
+access point to all database sessions. Every new connection is tuned according
+to a profile that can be chosen in the configuration file or through an
+environment variable. Sessions can be grouped into units of work so that
+several operations are committed (or rolled back) together. Existing databases
+are brought up to date with the mapping by the ordered migration steps defined
+here. When enabled, every SQL statement is counted and timed on behalf of the
+innermost SQL scope open in its thread (e.g. a controller event handler).
 """
 
 from contextlib import contextmanager
+import functools
+import json
 import os
+import threading
+import time
+try:
+    from configparser import ConfigParser
+except ImportError:  # Python 2
+    from ConfigParser import SafeConfigParser as ConfigParser
 
 import sqlalchemy
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 # hidden directory where the database will be stored
 _DB_DIR = os.path.join(os.path.expanduser('~'), '.reqmanager')
@@ -19,10 +35,169 @@ _DB_DIR = os.path.join(os.path.expanduser('~'), '.reqmanager')
 _DB_NAME = 'mydb.sqlite'
 # full path where the application DB is located
 DB_LOCATION = os.path.join(_DB_DIR, _DB_NAME)
-# connection string for the engine
-_DB_CONNECTION_STRING = 'sqlite:///' + DB_LOCATION
+# configuration file where e.g. the tuning profile of the DB can be set
+_CONFIG_LOCATION = os.path.join(_DB_DIR, 'config.ini')
+# environment variable that overrides the tuning profile of the config file
+_PROFILE_VARIABLE = 'REQMANAGER_DB_PROFILE'
+# tuning profile used when no (valid) profile has been chosen
+_DEFAULT_PROFILE = 'balanced'
+# environment variable that overrides the location of the SQL log set in the
+# config file, which also enables the instrumentation of SQL statements
+_SQL_LOG_VARIABLE = 'REQMANAGER_SQL_LOG'
+# label under which statements executed outside of any SQL scope are counted
+_UNSCOPED = '(unscoped)'
+# PRAGMA statements executed on every new connection for each tuning profile:
+# the conservative one is close to the SQLite defaults, the balanced one uses a
+# write-ahead log (which stays consistent with synchronous=NORMAL) and bigger
+# caches, while the fast one does not even sync the log (after an OS crash or
+# a power failure recent transactions can be lost and the DB can even get
+# corrupted, so it is only meant for scratch DBs)
+_PROFILES = {
+    'conservative': [('journal_mode', 'DELETE'), ('synchronous', 'FULL'),
+            ('cache_size', -2000), ('mmap_size', 0),
+            ('temp_store', 'DEFAULT'), ('busy_timeout', 5000)],
+    'balanced': [('journal_mode', 'WAL'), ('synchronous', 'NORMAL'),
+            ('cache_size', -16000), ('mmap_size', 64 * 1024 * 1024),
+            ('temp_store', 'MEMORY'), ('busy_timeout', 5000)],
+    'fast': [('journal_mode', 'WAL'), ('synchronous', 'OFF'),
+            ('cache_size', -64000), ('mmap_size', 256 * 1024 * 1024),
+            ('temp_store', 'MEMORY'), ('busy_timeout', 5000)]}
+
+
+def get_setting(variable_name, option_name, section_name='database'):
+    """Returns the value of the given environment variable or, if it is not
+    set, of the given option within the given section of the configuration
+    file (None if neither is set).
+    """
+    value = os.environ.get(variable_name)
+    if not value:
+        config = ConfigParser()
+        config.read(_CONFIG_LOCATION)
+        if config.has_option(section_name, option_name):
+            value = config.get(section_name, option_name)
+    return value or None
+
+
+def _get_profile_name():
+    """Returns the name of the tuning profile chosen through the environment
+    variable or, if it is not set, through the 'profile' option within the
+    'database' section of the configuration file (the default otherwise).
+    """
+    profile_name = get_setting(_PROFILE_VARIABLE, 'profile')
+    if profile_name not in _PROFILES:
+        return _DEFAULT_PROFILE
+    return profile_name
+
+
+def _tune_connection(profile_name, dbapi_connection, unused_record):
+    """Applies the PRAGMA statements of the given tuning profile to the given
+    (new) DBAPI connection.
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma, value in _PROFILES[profile_name]:
+        cursor.execute('PRAGMA {0} = {1}'.format(pragma, value))
+    cursor.close()
+
+
+# JSON-lines file where the statistics of each SQL scope are appended (the
+# instrumentation is disabled if None, unless it is enabled programmatically)
+_sql_log_location = get_setting(_SQL_LOG_VARIABLE, 'sql_log')
+# whether the statements executed by the engines are counted and timed
+_instrumented = _sql_log_location is not None
+# per-thread stack of the open SQL scopes, as [label, statements, rows,
+# seconds] lists, plus start times of the statements being executed indexed by
+# their execution contexts
+_scopes = threading.local()
+# statistics accumulated by label since the start of the process
+_sql_summary = {}
+# lock guarding the summary and the log file
+_sql_lock = threading.Lock()
+
+
+def _get_scope_stack():
+    """Returns the stack of the SQL scopes open in the current thread.
+    """
+    if not hasattr(_scopes, 'stack'):
+        _scopes.stack = []
+        _scopes.start_times = {}
+    return _scopes.stack
+
+
+def _add_to_summary(label, statements, rows, seconds, calls=0):
+    """Adds the given figures to the statistics of the given label.
+    """
+    with _sql_lock:
+        stats = _sql_summary.setdefault(label, {'calls': 0, 'statements': 0,
+                'rows': 0, 'seconds': 0.0})
+        stats['calls'] += calls
+        stats['statements'] += statements
+        stats['rows'] += rows
+        stats['seconds'] += seconds
+
+
+def _before_cursor_execute(unused_connection, unused_cursor, unused_statement,
+        unused_parameters, context, unused_executemany):
+    """Records the time at which a statement starts being executed.
+    """
+    _get_scope_stack()
+    _scopes.start_times[id(context)] = time.time()
+
+
+def _after_cursor_execute(unused_connection, cursor, unused_statement,
+        unused_parameters, context, unused_executemany):
+    """Charges a statement which has been executed to the innermost SQL scope
+    of the current thread. The rows are those reported by the driver, i.e. the
+    ones affected by writes (SQLite cannot tell how many rows a query returns
+    before they are fetched).
+    """
+    stack = _get_scope_stack()
+    seconds = time.time() - _scopes.start_times.pop(id(context))
+    rows = max(cursor.rowcount, 0)
+    if stack:
+        scope = stack[-1]
+        scope[1] += 1
+        scope[2] += rows
+        scope[3] += seconds
+    else:
+        _add_to_summary(_UNSCOPED, 1, rows, seconds)
+
+
+def _handle_error(exception_context):
+    """Forgets the start time of a statement which has failed, since no
+    after_cursor_execute event is going to be fired for it.
+    """
+    _get_scope_stack()
+    _scopes.start_times.pop(id(exception_context.execution_context), None)
+
+
+def _instrument_engine(engine):
+    """Makes the given engine count and time the statements it executes.
+    """
+    if not event.contains(engine, 'before_cursor_execute',
+            _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+
+
+def _create_engine(location, profile_name=None):
+    """Creates an engine for the SQLite DB at the given location, tuning each
+    new connection according to the given profile (the chosen one if None).
+    Connections are pooled, so that they are only tuned once and keep their
+    page cache and memory map across sessions: they can be checked out by any
+    thread, but each one is only used by a single thread at a time.
+    """
+    engine = sqlalchemy.create_engine('sqlite:///' + location,
+            poolclass=QueuePool, connect_args={'check_same_thread': False})
+    event.listen(engine, 'connect', functools.partial(_tune_connection,
+            profile_name or _get_profile_name()))
+    if _instrumented:
+        _instrument_engine(engine)
+    return engine
+
+
 # database engine used by SQLAlchemy
-_ENGINE = sqlalchemy.create_engine(_DB_CONNECTION_STRING)
+_ENGINE = _create_engine(DB_LOCATION)
 # session to be instantiated
 Session = scoped_session(sessionmaker(_ENGINE))
 
@@ -30,11 +205,127 @@ Session = scoped_session(sessionmaker(_ENGINE))
 MappedBase = declarative_base()
 
 
+@contextmanager
+def sql_scope(label):
+    """Charges the SQL statements executed by the current thread within this
+    context to the given label (unless a nested scope is opened), so that the
+    cost of e.g. a controller event can be measured. On exit the figures of
+    the scope are added to the in-process summary and appended to the SQL log
+    as a JSON object on a line of its own. Does nothing if the instrumentation
+    is disabled.
+    """
+    if not _instrumented:
+        yield
+        return
+    stack = _get_scope_stack()
+    scope = [label, 0, 0, 0.0]
+    stack.append(scope)
+    try:
+        yield
+    finally:
+        stack.pop()
+        _add_to_summary(*scope, calls=1)
+        if _sql_log_location:
+            record = {'scope': label, 'statements': scope[1],
+                    'rows': scope[2], 'seconds': scope[3],
+                    'timestamp': time.time()}
+            with _sql_lock:
+                with open(_sql_log_location, 'a') as log_file:
+                    log_file.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def enable_sql_instrumentation(log_location=None):
+    """Enables the instrumentation of the SQL statements executed from now on,
+    optionally appending the statistics of each scope to the given log file.
+    """
+    global _instrumented, _sql_log_location
+    _instrumented = True
+    _sql_log_location = log_location
+    _instrument_engine(_ENGINE)
+
+
+def get_sql_summary():
+    """Returns the statistics accumulated so far as a list of (label, stats)
+    pairs, where stats is a dictionary with the number of calls, statements
+    and rows and the total seconds, sorted by decreasing total time.
+    """
+    with _sql_lock:
+        summary = [(label, dict(stats))
+                for label, stats in _sql_summary.items()]
+    return sorted(summary, key=lambda pair: pair[1]['seconds'], reverse=True)
+
+
+# state of the unit of work open in each thread (if any)
+_unit = threading.local()
+
+
+def begin_unit_of_work():
+    """Opens a unit of work in the current thread: until it is ended, all the
+    sessions returned by get_session are the same one, whose changes are only
+    flushed to the DB and will be committed (or rolled back) all together.
+    """
+    if is_in_unit_of_work():
+        raise RuntimeError('A unit of work is already open')
+    _unit.session = Session()
+    _unit.failed = False
+    _unit.callbacks = []
+
+
+def is_in_unit_of_work():
+    """Tells whether a unit of work is open in the current thread.
+    """
+    return getattr(_unit, 'session', None) is not None
+
+
+def call_at_end_of_unit_of_work(function):
+    """Makes the given function (with no arguments) be called once the unit
+    of work open in the current thread has ended, whether it has been
+    committed or not. Each function is only called once per unit.
+    """
+    if not is_in_unit_of_work():
+        raise RuntimeError('No unit of work is open')
+    if function not in _unit.callbacks:
+        _unit.callbacks.append(function)
+
+
+def end_unit_of_work(discard=False):
+    """Ends the unit of work open in the current thread, committing its
+    changes unless they must be discarded or some operation within the unit
+    has failed. Returns True if the changes have been committed.
+    """
+    session = _unit.session
+    _unit.session = None
+    try:
+        if discard or _unit.failed:
+            session.rollback()
+            return False
+        session.commit()
+        return True
+    except sqlalchemy.exc.SQLAlchemyError as exc:
+        session.rollback()
+        raise exc
+    finally:
+        session.close()
+        for function in _unit.callbacks:
+            function()
+
+
 @contextmanager
 def get_session():
     """Returns a session instance to be used for querying/manipulating the
-    information stored in the application database.
+    information stored in the application database. Within a unit of work the
+    session of the unit is returned and changes are flushed but not committed.
     """
+    session = getattr(_unit, 'session', None)
+    if session is not None:
+        try:
+            yield session
+            session.flush()
+        except sqlalchemy.exc.SQLAlchemyError as exc:
+            _unit.failed = True
+            session.rollback()
+            raise exc
+        return
     session = Session()
     try:
         yield session
@@ -46,9 +337,106 @@ def get_session():
         session.close()
 
 
+def get_engine():
+    """Returns the engine bound to the sessions being created.
+    """
+    return _ENGINE
+
+
+def use_database(location, profile_name=None):
+    """Makes all the sessions created from now on work on the DB at the given
+    location, tuned according to the given profile, and returns its engine.
+    This is meant for tools and benchmarks working on other DBs than the one
+    of the application. The connections of the previous engine are closed.
+    """
+    global _ENGINE
+    Session.remove()
+    _ENGINE.dispose()
+    _ENGINE = _create_engine(location, profile_name)
+    Session.configure(bind=_ENGINE)
+    return _ENGINE
+
+
+def _add_secondary_indexes(cursor):
+    """Migration step adding the indexes used by hierarchy, filter and
+    reverse-association lookups.
+    """
+    for index_name, table_name, column_names in [
+            ('ix_Requirements_parent_id', 'Requirements', 'parent_id'),
+            ('ix_Requirements_source_id', 'Requirements', 'source_id'),
+            ('ix_Requirements_req_type_priority', 'Requirements',
+                    'req_type, priority'),
+            ('ix_UseCases_parent_id', 'UseCases', 'parent_id'),
+            ('ix_UseCasesRequirements_uc_id', 'UseCasesRequirements',
+                    'uc_id'),
+            ('ix_RequirementsTests_test_id', 'RequirementsTests',
+                    'test_id')]:
+        cursor.execute('CREATE INDEX IF NOT EXISTS {0} ON {1} ({2})'.format(
+                index_name, table_name, column_names))
+
+
+# ordered upgrade steps of the DB schema: the i-th step takes a DB from
+# version i to version i + 1 (the version is stored as PRAGMA user_version)
+# and receives a DBAPI cursor on which it executes its statements; new steps
+# must only be appended and must never change once released
+_MIGRATIONS = [_add_secondary_indexes]
+# version of the DB schema described by the mapping
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+
+def get_schema_version(engine):
+    """Returns the schema version of the DB the given engine is bound to.
+    """
+    return engine.execute('PRAGMA user_version').scalar()
+
+
+def _set_schema_version(cursor, version):
+    """Stores the given schema version in the DB (PRAGMA statements do not
+    accept bound parameters, hence the formatting).
+    """
+    cursor.execute('PRAGMA user_version = {0:d}'.format(version))
+
+
+def upgrade_db(engine):
+    """Brings the DB the given engine is bound to up to the current schema
+    version, applying the pending migration steps in order. Each step runs in
+    its own transaction together with the update of the stored version, so
+    that a failed step leaves the DB at the last version that was reached.
+    Returns the number of steps that were applied.
+    """
+    current_version = get_schema_version(engine)
+    connection = engine.raw_connection()
+    # the driver would otherwise commit before each DDL statement by itself
+    # (the option must be set on the DBAPI connection, not on its pool proxy)
+    dbapi_connection = connection.connection
+    isolation_level = dbapi_connection.isolation_level
+    dbapi_connection.isolation_level = None
+    try:
+        cursor = connection.cursor()
+        for version in range(current_version, SCHEMA_VERSION):
+            cursor.execute('BEGIN')
+            try:
+                _MIGRATIONS[version](cursor)
+                _set_schema_version(cursor, version + 1)
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+        cursor.close()
+    finally:
+        dbapi_connection.isolation_level = isolation_level
+        connection.close()
+    return max(SCHEMA_VERSION - current_version, 0)
+
+
 def initialize_db():
-    """Initializes the DB if it was not present on disk.
+    """Initializes the DB if it was not present on disk, otherwise upgrades it
+    to the current schema version.
     """
     if not os.path.exists(DB_LOCATION):
-        os.mkdir(_DB_DIR)
+        if not os.path.isdir(_DB_DIR):
+            os.mkdir(_DB_DIR)
         MappedBase.metadata.create_all(_ENGINE)
+        _ENGINE.execute('PRAGMA user_version = {0:d}'.format(SCHEMA_VERSION))
+    else:
+        upgrade_db(_ENGINE)
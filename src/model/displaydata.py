@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""This module loads everything that is needed to display an item in the
+central area of the main window and caches it, so that it can be done by
+worker threads ahead of time. Nothing here depends on Qt.
+"""
+
+from collections import OrderedDict
+import threading
+
+from src.model import catalog, dal
+
+
+# kinds of items, in the same order as the entries of the view selector
+REQUIREMENT, USE_CASE, TEST, SOURCE = range(4)
+# maximum number of items whose display data is kept in the cache
+_CACHE_SIZE = 32
+# single instance of the display data cache
+_cache = None
+# lock guarding the creation of the single instance of the cache
+_cache_lock = threading.Lock()
+
+
+def load_display_data(kind, item_id):
+    """Loads everything that is needed to display the item of the given kind
+    with the given ID and returns it as a dictionary whose 'item' key holds
+    the (detached) transfer object, or None if there is no such item. This
+    does not touch any widget, so it can run outside of the GUI thread.
+    """
+    if kind == REQUIREMENT:
+        data = {'item': dal.get_requirement(item_id),
+                'source_names': dal.get_all_source_names(),
+                'requirement_ids': dal.get_all_requirement_ids()}
+        catalogs = [catalog.get_use_case_catalog(), catalog.get_test_catalog()]
+    elif kind == USE_CASE:
+        data = {'item': dal.get_use_case(item_id),
+                'use_case_ids': dal.get_all_use_case_ids()}
+        catalogs = [catalog.get_requirement_catalog()]
+    elif kind == TEST:
+        data = {'item': dal.get_test(item_id)}
+        catalogs = [catalog.get_requirement_catalog()]
+    else:
+        data = {'item': dal.get_source(item_id)}
+        catalogs = []
+    if data['item'] is None:
+        return None
+    for item_catalog in catalogs:  # the list models will read them
+        item_catalog.entries
+    return data
+
+
+class DisplayCache(object):
+    """Thread-safe cache of the display data of the most recently used items,
+    indexed by (kind, item ID) pairs and evicted in LRU order. Every
+    invalidation increases the generation of the cache, and data loaded while
+    an older generation was current is not stored because it may be stale.
+    """
+    def __init__(self, size):
+        self._size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, item_id):
+        """Returns the cached data of the given item (None if it is not
+        cached), counting the hit or miss.
+        """
+        with self._lock:
+            data = self._entries.pop((kind, item_id), None)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries[(kind, item_id)] = data  # most recently used
+            self.hits += 1
+            return data
+
+    def contains(self, kind, item_id):
+        """Tells whether the data of the given item is cached, without
+        affecting statistics and eviction order.
+        """
+        with self._lock:
+            return (kind, item_id) in self._entries
+
+    def store(self, kind, item_id, data, generation):
+        """Caches the given data of the given item, which has been loaded when
+        the given generation was current, evicting the least recently used
+        entry if the cache is full.
+        """
+        with self._lock:
+            if data is None or generation != self.generation:
+                return
+            self._entries.pop((kind, item_id), None)
+            self._entries[(kind, item_id)] = data
+            if len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, kind=None, item_id=None):
+        """Discards the data of the given item, of all the items of the given
+        kind if no ID is given or of all the items if not even the kind is.
+        """
+        with self._lock:
+            self.generation += 1
+            for key in list(self._entries):
+                if kind is None or (key[0] == kind and
+                        (item_id is None or key[1] == item_id)):
+                    del self._entries[key]
+
+    @property
+    def stats(self):
+        """Dictionary with the number of hits and misses and the hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': float(self.hits) / lookups if lookups else 0.0}
+
+
+def get_display_cache():
+    """Returns a reference to the single instance of the display data cache.
+    """
+    global _cache
+    with _cache_lock:
+        if not _cache:
+            _cache = DisplayCache(_CACHE_SIZE)
+    return _cache
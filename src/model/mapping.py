@@ -7,7 +7,7 @@ exposed outside but are used to represent many-to-many relationships instead.
 """
 
 from sqlalchemy.orm import relationship
-from sqlalchemy.schema import Column, ForeignKey, Table
+from sqlalchemy.schema import Column, ForeignKey, Index, Table
 from sqlalchemy.types import String, Enum, Integer
 
 from src.model.constants import TYPE_LIST, PRIORITY_LIST
@@ -19,14 +19,18 @@ _uc_req = Table('UseCasesRequirements', MappedBase.metadata,
         Column('req_id', String, ForeignKey('Requirements.req_id',
         ondelete='CASCADE', onupdate='CASCADE'), primary_key=True),
         Column('uc_id', String, ForeignKey('UseCases.uc_id',
-        ondelete='CASCADE', onupdate='CASCADE'), primary_key=True))
+        ondelete='CASCADE', onupdate='CASCADE'), primary_key=True),
+        # lookups by requirement are served by the primary key
+        Index('ix_UseCasesRequirements_uc_id', 'uc_id'))
 
 # map the many-to-many relationship between tests and requirements
 _req_test = Table('RequirementsTests', MappedBase.metadata,
         Column('req_id', String, ForeignKey('Requirements.req_id',
         ondelete='CASCADE', onupdate='CASCADE'), primary_key=True),
         Column('test_id', String, ForeignKey('SystemTests.test_id',
-        ondelete='CASCADE', onupdate='CASCADE'), primary_key=True))
+        ondelete='CASCADE', onupdate='CASCADE'), primary_key=True),
+        # lookups by requirement are served by the primary key
+        Index('ix_RequirementsTests_test_id', 'test_id'))
 
 
 class Source(MappedBase):
@@ -52,11 +56,11 @@ class UseCase(MappedBase):
     uc_id = Column(String, primary_key=True)
     description = Column(String, nullable=False)
     parent_id = Column(String, ForeignKey('UseCases.uc_id',
-            ondelete='CASCADE', onupdate='CASCADE'))
+            ondelete='CASCADE', onupdate='CASCADE'), index=True)
     image = Column(String)
     # relationships
     requirements = relationship('Requirement', secondary=_uc_req,
-            cascade='all', lazy='joined', join_depth=1)
+            cascade='all')
 
     def __init__(self, uc_id, description, image, parent_id):
         super(UseCase, self).__init__()
@@ -71,21 +75,22 @@ class Requirement(MappedBase):
     """
     # mapped table
     __tablename__ = 'Requirements'
+    __table_args__ = (Index('ix_Requirements_req_type_priority', 'req_type',
+            'priority'),)
     # field mapping
     req_id = Column(String, primary_key=True)
     description = Column(String)
     parent_id = Column(String, ForeignKey('Requirements.req_id',
-            ondelete='CASCADE', onupdate='CASCADE'))
+            ondelete='CASCADE', onupdate='CASCADE'), index=True)
     req_type = Column(Enum(*TYPE_LIST))
     priority = Column(Enum(*PRIORITY_LIST))
     source_id = Column(Integer, ForeignKey('Sources.source_id',
-            onupdate='CASCADE', ondelete='SET NULL'))
-    # relationships
-    use_cases = relationship('UseCase', secondary=_uc_req, cascade='all',
-            lazy='joined', join_depth=1)
-    tests = relationship('SystemTest', secondary=_req_test, cascade='all',
-            lazy='joined', join_depth=1)
-    source = relationship('Source', lazy='joined', join_depth=1, uselist=False)
+            onupdate='CASCADE', ondelete='SET NULL'), index=True)
+    # relationships (loaded only when needed, the data access layer chooses
+    # how to load them eagerly query by query)
+    use_cases = relationship('UseCase', secondary=_uc_req, cascade='all')
+    tests = relationship('SystemTest', secondary=_req_test, cascade='all')
+    source = relationship('Source', uselist=False)
 
     def __init__(self, req_id, description, req_type, priority, source_id,
             parent_id):
@@ -109,7 +114,7 @@ class SystemTest(MappedBase):
     description = Column(String)
     # relationships
     requirements = relationship('Requirement', secondary=_req_test,
-            cascade='all', lazy='joined', join_depth=1)
+            cascade='all')
 
     def __init__(self, test_id, description):
         super(SystemTest, self).__init__()
@@ -11,7 +11,7 @@ remove, reparent or rename items, notifying the attached views about changes.
 
 from PySide import QtCore
 
-from src.model import dal
+from src.model import catalog, dal, database as db
 
 
 # single instance of the requirement model
@@ -22,17 +22,32 @@ _testm = None
 _ucm = None
 # single instance of the source model
 _srcm = None
+# whether the requirement and use case trees load children only on demand
+_LAZY_TREES = True
+# (immutable) children sequence shared by all the nodes having no children
+_NO_CHILDREN = ()
 
 
 class ItemNode(object):
     """This is used to represent an item (requirement, test or use case...) in
     a tree-like data structure with parents an children. These objects are
-    used as internal data structures for ItemModels.
+    used as internal data structures for ItemModels. Since models may hold
+    lots of them, they have no instance dictionary and leaf nodes all share
+    the same empty children sequence until their first child is added.
     """
-    def __init__(self, item_id, parent=None):
+    __slots__ = ('item_id', 'children', 'parent', 'row', 'fetched',
+            'child_count')
+
+    def __init__(self, item_id, parent=None, row=0):
         self.item_id = item_id
-        self.children = []
+        self.children = _NO_CHILDREN
         self.parent = parent
+        # position of the node among its siblings
+        self.row = row
+        # False until the children have been loaded (lazy models only)
+        self.fetched = True
+        # number of children still to be loaded, None if it is unknown
+        self.child_count = None
 
 
 def get_requirement_model():
@@ -40,7 +55,7 @@ def get_requirement_model():
     """
     global _reqm
     if not _reqm:
-        _reqm = RequirementModel()
+        _reqm = RequirementModel(_LAZY_TREES)
     return _reqm
 
 
@@ -67,7 +82,7 @@ def get_use_case_model():
     """
     global _ucm
     if not _ucm:
-        _ucm = UseCaseModel()
+        _ucm = UseCaseModel(_LAZY_TREES)
     return _ucm
 
 
@@ -90,52 +105,149 @@ def get_requirement_list_model(item):
 
 
 class ItemModel(QtCore.QAbstractItemModel):
-    """Abstract item model subclass used to represent a forest of items.
+    """Abstract item model subclass used to represent a forest of items. In
+    lazy mode only top level items are loaded at first, while the children of
+    an item are loaded when views first need them (e.g. on expansion).
     """
-    def __init__(self):
+    def __init__(self, lazy=False):
         super(ItemModel, self).__init__()
+        self._lazy = lazy
         self._item_forest = []
+        # maps each item ID to the corresponding node in the forest
+        self._item_index = {}
         self.initialize()
 
     @classmethod
-    def _generate_tree(cls, item_id, parent=None):
-        """Given an item with the given ID, it recursively generates a tree of
-        ItemNodes rooted in the item with the given ID. It internally uses the
-        _get_children method to obtain a list of the ID of the item's children.
+    def _build_forest(cls, hierarchy):
+        """Given an iterable of (item ID, parent ID) pairs ordered by item ID,
+        it builds the corresponding list of trees of ItemNodes in memory. Items
+        whose parent cannot be found are left out, as they would never be
+        reached descending from the top level items.
+        """
+        nodes = {}
+        links = []
+        for item_id, parent_id in hierarchy:
+            nodes[item_id] = ItemNode(item_id)
+            links.append((item_id, parent_id))
+        forest = []
+        for item_id, parent_id in links:
+            item = nodes[item_id]
+            if parent_id is None:
+                item.row = len(forest)
+                forest.append(item)
+            elif parent_id in nodes:
+                item.parent = nodes[parent_id]
+                if not item.parent.children:
+                    item.parent.children = []
+                item.row = len(item.parent.children)
+                item.parent.children.append(item)
+        return forest
+
+    @classmethod
+    def _get_hierarchy(cls):
+        """This hook method should be implemented by subclasses to obtain an
+        iterable of (item ID, parent ID) pairs, ordered by item ID, for all the
+        items to be represented (parent ID is None for top level items).
         """
-        item = ItemNode(item_id, parent)
-        children_list = cls._get_children(item_id)
-        for child_id in children_list:
-            item.children.append(cls._generate_tree(child_id, item))
-        return item
+        raise NotImplementedError('Implement me!')
 
     @classmethod
     def _get_children(cls, item_id):
-        """This hook method should be implemented by subclasses to obtain a
-        list of item IDs corresponding to the children of the item with the
-        given item ID.
+        """This hook method should be implemented by subclasses supporting the
+        lazy mode to obtain a list of (item ID, number of children) pairs for
+        the children of the item with the given ID (top level items if None).
         """
         raise NotImplementedError('Implement me!')
 
-    @classmethod
-    def _find_in_tree(cls, item, item_id):
-        """Returns a reference to the ItemNode with the given item_id if it is
-        found in the tree rooted in the given item, None otherwise.
+    def _add_unfetched_node(self, item_id, child_count, parent):
+        """Appends to the given parent (None for the forest) a new node whose
+        children are still to be loaded and registers it in the index.
+        """
+        item = ItemNode(item_id)
+        item.fetched = False
+        item.child_count = child_count
+        self._attach(item, parent)
+        self._item_index[item_id] = item
+
+    def _fetch_missing_top_level_items(self):
+        """Appends to the forest the top level items which are not in the model
+        yet, e.g. those whose parent was deleted before they were loaded.
+        """
+        missing_items = [(item_id, child_count)
+                for item_id, child_count in self._get_children(None)
+                if item_id not in self._item_index]
+        if not missing_items:
+            return
+        tree_count = len(self._item_forest)
+        self.beginInsertRows(QtCore.QModelIndex(), tree_count,
+                tree_count + len(missing_items) - 1)
+        for item_id, child_count in missing_items:
+            self._add_unfetched_node(item_id, child_count, None)
+        self.endInsertRows()
+
+    def _notify_children_added(self, parent):
+        """Informs the views that an item whose children have not been loaded
+        yet has gained a new child (so that it is shown as expandable).
+        """
+        parent.child_count = (parent.child_count or 0) + 1
+        self.layoutAboutToBeChanged.emit()
+        self.layoutChanged.emit()
+
+    def _unindex_tree(self, item):
+        """Removes all the nodes of the tree rooted in the given item from the
+        dictionary that maps item IDs to the corresponding ItemNodes.
         """
-        if item.item_id == item_id:
-            return item
-        for child in item.children:
-            rv = cls._find_in_tree(child, item_id)
-            if rv:  # stop recurring if the desired item has been found
-                return rv
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            del self._item_index[node.item_id]
+            stack.extend(node.children)
+
+    def _index_tree(self, item):
+        """Registers all the nodes of the tree rooted in the given item in the
+        dictionary that maps item IDs to the corresponding ItemNodes.
+        """
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            self._item_index[node.item_id] = node
+            stack.extend(node.children)
 
     def _search_forest(self, item_id):
-        """Search the whole list of trees for a node with the given item ID.
+        """Returns the node with the given item ID (None if there is none),
+        which is looked up in the index instead of walking the whole forest.
+        """
+        return self._item_index.get(item_id)
+
+    def _get_siblings(self, parent):
+        """Returns the list of children of the given parent node, or the list
+        of trees in the forest if the parent is None.
         """
-        for tree in self._item_forest:
-            rv = self._find_in_tree(tree, item_id)
-            if rv:  # stop iterating once the item has been found
-                return rv
+        if parent:
+            return parent.children
+        return self._item_forest
+
+    def _attach(self, item, parent):
+        """Appends the given item as the last child of the given parent (or as
+        the last tree of the forest if the parent is None) updating its row.
+        """
+        if parent and not parent.children:
+            parent.children = []
+        siblings = self._get_siblings(parent)
+        item.parent = parent
+        item.row = len(siblings)
+        siblings.append(item)
+
+    def _detach(self, item):
+        """Removes the given item from the list of its siblings, shifting back
+        the rows of those that followed it.
+        """
+        siblings = self._get_siblings(item.parent)
+        del siblings[item.row]
+        for sibling in siblings[item.row:]:
+            sibling.row -= 1
+        if item.parent and not siblings:
+            item.parent.children = _NO_CHILDREN
 
     def append_child_to_parent(self, item_id, parent_id=None):
         """Appends a new item in the correct place in the model, notifying the
@@ -146,16 +258,23 @@ class ItemModel(QtCore.QAbstractItemModel):
             parent_index = QtCore.QModelIndex()
             self.beginInsertRows(parent_index, child_count, child_count)
             new_child = ItemNode(item_id)
-            self._item_forest.append(new_child)
+            self._attach(new_child, None)
+            self._item_index[item_id] = new_child
             self.endInsertRows()
         else:  # adding an item as a leaf in some tree (where the parent is)
             parent = self._search_forest(parent_id)
+            if not parent:  # the parent has not been loaded yet (lazy mode)
+                return
+            if not parent.fetched:  # it will be loaded with its siblings
+                self._notify_children_added(parent)
+                return
             child_count = len(parent.children)
-            parent_index = self.createIndex(0, 0, parent)
+            parent_index = self.createIndex(parent.row, 0, parent)
             self.layoutAboutToBeChanged.emit()  # why is this needed?
             self.beginInsertRows(parent_index, child_count, child_count)
-            new_child = ItemNode(item_id, parent)
-            parent.children.append(new_child)
+            new_child = ItemNode(item_id)
+            self._attach(new_child, parent)
+            self._item_index[item_id] = new_child
             self.endInsertRows()
             self.layoutChanged.emit()
 
@@ -163,8 +282,12 @@ class ItemModel(QtCore.QAbstractItemModel):
         """Changes the ID of the item with the given old ID to the new one.
         """
         item = self._search_forest(old_id)
-        index = self.createIndex(0, 0, item)
+        if not item:  # the item has not been loaded yet (lazy mode)
+            return
+        index = self.createIndex(item.row, 0, item)
         item.item_id = new_id
+        del self._item_index[old_id]
+        self._item_index[new_id] = item
         self.dataChanged.emit(index, index)
 
     def delete_item(self, item_id):
@@ -174,19 +297,15 @@ class ItemModel(QtCore.QAbstractItemModel):
         DB since the parent_id field is set to null).
         """
         item = self._search_forest(item_id)
-        index = self.createIndex(0, 0, item)
+        if not item:  # not loaded yet, but its children may now be top level
+            self._fetch_missing_top_level_items()
+            return
+        index = self.createIndex(item.row, 0, item)
         parent_index = self.parent(index)
-        parent = item.parent
-        if parent:
-            row = parent.children.index(item)
-        else:
-            row = self._item_forest.index(item)
         # remove the item from its parent's children
-        self.beginRemoveRows(parent_index, row, row)
-        if parent:
-            parent.children.remove(item)
-        else:
-            self._item_forest.remove(item)
+        self.beginRemoveRows(parent_index, item.row, item.row)
+        self._detach(item)
+        del self._item_index[item_id]
         self.endRemoveRows()
         # adds the children to the root of the model (they have no parent)
         root_index = QtCore.QModelIndex()
@@ -194,10 +313,10 @@ class ItemModel(QtCore.QAbstractItemModel):
         self.beginInsertRows(root_index, tree_count,
                 tree_count + len(item.children) - 1)
         while item.children:
-            child = item.children.pop()
-            child.parent = None
-            self._item_forest.append(child)
+            self._attach(item.children.pop(), None)
         self.endInsertRows()
+        if not item.fetched:  # children that were never loaded are top level
+            self._fetch_missing_top_level_items()
         del item
         self.layoutChanged.emit()
 
@@ -206,56 +325,68 @@ class ItemModel(QtCore.QAbstractItemModel):
         tree model and informing the view about the changes occurred.
         """
         item = self._search_forest(item_id)
-        index = self.createIndex(0, 0, item)
-        old_parent_index = self.parent(index)
         new_parent = self._search_forest(new_parent_id)
+        if (new_parent_id and not (new_parent and new_parent.fetched) or
+                not item):
+            # either end of the move has not been loaded yet (lazy mode)
+            self._update_unfetched_item_parent(item, item_id, new_parent,
+                    new_parent_id)
+            return
+        index = self.createIndex(item.row, 0, item)
+        old_parent_index = self.parent(index)
         if not new_parent:  # it has become first level
             new_parent_index = QtCore.QModelIndex()
         else:  # it gets moved somewhere else in the forest
-            new_parent_index = self.createIndex(0, 0, new_parent)
-        # determines the old row number
-        if item.parent:
-            row = item.parent.children.index(item)
-        else:
-            row = self._item_forest.index(item)
-        # determines the new row number
-        if new_parent:
-            new_row = len(new_parent.children)
-        else:
-            new_row = len(self._item_forest)
+            new_parent_index = self.createIndex(new_parent.row, 0, new_parent)
+        # the item is appended to the list of its new siblings
+        new_row = len(self._get_siblings(new_parent))
         # begin the actual operation
         self.beginMoveRows(
-                old_parent_index, row, row, new_parent_index, new_row)
-        # removes the item from its parent's children
-        if item.parent:
-            item.parent.children.remove(item)
-        else:
-            self._item_forest.remove(item)
-        # appends it to the list of its new siblings
-        if new_parent:
-            new_parent.children.append(item)
-        else:
-            self._item_forest.append(item)
-        # reparents the item
-        item.parent = new_parent
+                old_parent_index, item.row, item.row, new_parent_index,
+                new_row)
+        self._detach(item)
+        self._attach(item, new_parent)
         self.endMoveRows()
         self.layoutChanged.emit()
 
-    @classmethod
-    def _get_top_level_items(cls):
-        """This hook method should be implemented in subclasses to obtain a
-        list of those IDs corresponding to items with no parent.
-        """
-        raise NotImplementedError('Implement me!')
+    def _update_unfetched_item_parent(self, item, item_id, new_parent,
+            new_parent_id):
+        """Handles the moves involving items that have not been loaded yet: the
+        item is dropped if it gets moved where children have not been loaded,
+        while it is added if it comes from somewhere that was never loaded.
+        """
+        if item:
+            index = self.createIndex(item.row, 0, item)
+            self.beginRemoveRows(self.parent(index), item.row, item.row)
+            self._detach(item)
+            self._unindex_tree(item)
+            self.endRemoveRows()
+        if new_parent and not new_parent.fetched:
+            self._notify_children_added(new_parent)
+        elif not item and (new_parent or not new_parent_id):
+            if new_parent:
+                parent_index = self.createIndex(new_parent.row, 0, new_parent)
+            else:
+                parent_index = QtCore.QModelIndex()
+            row = len(self._get_siblings(new_parent))
+            self.beginInsertRows(parent_index, row, row)
+            self._add_unfetched_node(item_id, None, new_parent)
+            self.endInsertRows()
 
     def initialize(self):
         """Rebuilds the internal data structure based on the DB.
         """
         self.beginResetModel()
-        self._item_forest = []
-        for item_id in self._get_top_level_items():
-            # creates the forest as a list of trees
-            self._item_forest.append(self._generate_tree(item_id))
+        self._item_index = {}
+        with db.sql_scope('{0}.initialize'.format(type(self).__name__)):
+            if self._lazy:
+                self._item_forest = []
+                for item_id, child_count in self._get_children(None):
+                    self._add_unfetched_node(item_id, child_count, None)
+            else:
+                self._item_forest = self._build_forest(self._get_hierarchy())
+                for tree in self._item_forest:
+                    self._index_tree(tree)
         self.endResetModel()
 
     def flags(self, index=QtCore.QModelIndex()):
@@ -299,8 +430,7 @@ class ItemModel(QtCore.QAbstractItemModel):
         parent = item.parent
         if not parent:  # can't go backwards past the root
             return QtCore.QModelIndex()
-        row = parent.children.index(item)
-        return self.createIndex(row, 0, parent)
+        return self.createIndex(parent.row, 0, parent)
 
     def rowCount(self, parent=QtCore.QModelIndex()):
         """This boils down to the number of children that the item pointed by
@@ -312,6 +442,42 @@ class ItemModel(QtCore.QAbstractItemModel):
         item = parent.internalPointer()
         return len(item.children)
 
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        """Items whose children have not been loaded yet are expandable unless
+        they are known to have no children at all.
+        """
+        if not parent.isValid() or not parent.internalPointer():
+            return len(self._item_forest) > 0
+        item = parent.internalPointer()
+        if item.fetched:
+            return len(item.children) > 0
+        return item.child_count is None or item.child_count > 0
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        """Only items whose children have not been loaded yet can fetch more.
+        """
+        if not parent.isValid() or not parent.internalPointer():
+            return False
+        return not parent.internalPointer().fetched
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        """Loads the children of the item pointed by the given index, which is
+        done the first time the views need them.
+        """
+        if not self.canFetchMore(parent):
+            return
+        item = parent.internalPointer()
+        with db.sql_scope('{0}.fetchMore'.format(type(self).__name__)):
+            children = self._get_children(item.item_id)
+        item.fetched = True
+        item.child_count = None
+        if not children:
+            return
+        self.beginInsertRows(parent, 0, len(children) - 1)
+        for child_id, child_count in children:
+            self._add_unfetched_node(child_id, child_count, item)
+        self.endInsertRows()
+
     def columnCount(self, unused_parent=QtCore.QModelIndex()):
         """These models only have one column, no matter what the parent is.
         """
@@ -331,39 +497,41 @@ class ItemModel(QtCore.QAbstractItemModel):
 class RequirementModel(ItemModel):
     """This is used to store the requirement forest (list of trees).
     """
-    def __init__(self):
-        super(RequirementModel, self).__init__()
+    def __init__(self, lazy=False):
+        super(RequirementModel, self).__init__(lazy)
 
     @classmethod
     def _get_children(cls, item_id):
-        """Returns an iterable with all the children of a given requirement.
+        """Returns the IDs and the numbers of children of the children of the
+        given requirement (or of the top level ones if the ID is None).
         """
-        return dal.get_requirement_children_ids(item_id)
+        return dal.get_requirement_children_summary(item_id)
 
     @classmethod
-    def _get_top_level_items(cls):
-        """Returns an iterable of all those requirements that have no parent.
+    def _get_hierarchy(cls):
+        """Returns the (ID, parent ID) pairs of all requirements.
         """
-        return dal.get_top_level_requirement_ids()
+        return dal.get_requirement_hierarchy()
 
 
 class UseCaseModel(ItemModel):
     """This is used to store the use case forest (list of trees).
     """
-    def __init__(self):
-        super(UseCaseModel, self).__init__()
+    def __init__(self, lazy=False):
+        super(UseCaseModel, self).__init__(lazy)
 
     @classmethod
     def _get_children(cls, item_id):
-        """Returns an iterable with all the children of a given requirement.
+        """Returns the IDs and the numbers of children of the children of the
+        given use case (or of the top level ones if the ID is None).
         """
-        return dal.get_use_case_children_ids(item_id)
+        return dal.get_use_case_children_summary(item_id)
 
     @classmethod
-    def _get_top_level_items(cls):
-        """Returns an iterable of all those use cases that have no parent.
+    def _get_hierarchy(cls):
+        """Returns the (ID, parent ID) pairs of all use cases.
         """
-        return dal.get_top_level_use_case_ids()
+        return dal.get_use_case_hierarchy()
 
 
 class TestModel(ItemModel):
@@ -373,16 +541,10 @@ class TestModel(ItemModel):
         super(TestModel, self).__init__()
 
     @classmethod
-    def _get_children(cls, unused_item_id):
-        """Tests have no children (flat model) so this is always an empty list.
-        """
-        return []
-
-    @classmethod
-    def _get_top_level_items(cls):
-        """Returns an iterable of all those tests that have no parent.
+    def _get_hierarchy(cls):
+        """Tests have no children (flat model) so they are all top level items.
         """
-        return dal.get_all_test_ids()
+        return [(test_id, None) for test_id in dal.get_all_test_ids()]
 
 
 class SourceModel(ItemModel):
@@ -392,16 +554,10 @@ class SourceModel(ItemModel):
         super(SourceModel, self).__init__()
 
     @classmethod
-    def _get_children(cls, unused_item_id):
-        """This is (hopefully) a flat model so this is always an empty list.
-        """
-        return []
-
-    @classmethod
-    def _get_top_level_items(cls):
-        """Returns an iterable of all requirement sources.
+    def _get_hierarchy(cls):
+        """This is (hopefully) a flat model so all sources are top level items.
         """
-        return dal.get_all_source_ids()
+        return [(source_id, None) for source_id in dal.get_all_source_ids()]
 
 
 class ItemListModel(QtCore.QAbstractItemModel):
@@ -413,7 +569,14 @@ class ItemListModel(QtCore.QAbstractItemModel):
     def __init__(self, item):
         super(ItemListModel, self).__init__()
         self._item_data_list = self._get_item_names_and_descriptions()
-        self.associated_item_ids = self._get_associated_item_ids(item)
+        self._associated_item_ids = set(self._get_associated_item_ids(item))
+
+    @property
+    def associated_item_ids(self):
+        """List of the IDs of the items that are currently checked, which is
+        what the controller expects in order to update the associations.
+        """
+        return sorted(self._associated_item_ids)
 
     @classmethod
     def _get_item_names_and_descriptions(cls):
@@ -454,7 +617,7 @@ class ItemListModel(QtCore.QAbstractItemModel):
         have no children, whereas if the index corresponds to the model 'root',
         it has as many children as are the elements in the internal data list.
         """
-        if index.internalPointer() in self._item_data_list:
+        if index.isValid():
             return 0
         return len(self._item_data_list)
 
@@ -488,7 +651,7 @@ class ItemListModel(QtCore.QAbstractItemModel):
                 return item_data['description']
         if role == QtCore.Qt.CheckStateRole:
             if section == 2:
-                if item_data['id'] in self.associated_item_ids:
+                if item_data['id'] in self._associated_item_ids:
                     return QtCore.Qt.Checked
                 return QtCore.Qt.Unchecked
 
@@ -501,13 +664,13 @@ class ItemListModel(QtCore.QAbstractItemModel):
         item_id = index.internalPointer()['id']
         if role == QtCore.Qt.CheckStateRole and section == 2:
             if (value == QtCore.Qt.Checked and
-                    item_id not in self.associated_item_ids):
-                self.associated_item_ids.append(item_id)
+                    item_id not in self._associated_item_ids):
+                self._associated_item_ids.add(item_id)
                 self.dataChanged.emit(index, index)
                 return True
             if (value == QtCore.Qt.Unchecked and
-                    item_id in self.associated_item_ids):
-                self.associated_item_ids.remove(item_id)
+                    item_id in self._associated_item_ids):
+                self._associated_item_ids.remove(item_id)
                 self.dataChanged.emit(index, index)
                 return True
         return False
@@ -523,7 +686,7 @@ class UseCaseListModel(ItemListModel):
     def _get_item_names_and_descriptions(cls):
         """Returns IDs and descriptions of all uses cases.
         """
-        return dal.get_all_uc_names_and_descriptions()
+        return catalog.get_use_case_catalog().entries
 
     @classmethod
     def _get_associated_item_ids(cls, item):
@@ -543,7 +706,7 @@ class TestListModel(ItemListModel):
     def _get_item_names_and_descriptions(cls):
         """Returns IDs and descriptions of all tests.
         """
-        return dal.get_all_test_names_and_descriptions()
+        return catalog.get_test_catalog().entries
 
     @classmethod
     def _get_associated_item_ids(cls, item):
@@ -564,7 +727,7 @@ class RequirementListModel(ItemListModel):
     def _get_item_names_and_descriptions(cls):
         """Returns IDs and descriptions of all requirements.
         """
-        return dal.get_all_requirement_names_and_descriptions()
+        return catalog.get_requirement_catalog().entries
 
     @classmethod
     def _get_associated_item_ids(cls, item):
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+"""This package contains the tests of the data layer, which run headless on
+scratch databases.
+"""
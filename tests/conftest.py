@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"""Fixtures shared by the tests: a scratch DB with the current schema and the
+capture of the SQL statements executed on it.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import event
+
+from src.model import database as db
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Makes the sessions work on a scratch DB with the current schema and
+    returns its engine.
+    """
+    engine = db.use_database(os.path.join(str(tmp_path), 'test.sqlite'))
+    db.MappedBase.metadata.create_all(engine)
+    yield engine
+    db.Session.remove()
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    """Returns the list where the (statement, parameters) pairs executed on
+    the scratch DB are appended from now on.
+    """
+    executed = []
+
+    def record(unused_connection, unused_cursor, statement, parameters,
+            unused_context, unused_executemany):
+        executed.append((statement, parameters))
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
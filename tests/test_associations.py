@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the update of the associations between items.
+"""
+
+import pytest
+from sqlalchemy.orm.exc import NoResultFound
+
+from src.model import dal
+
+
+@pytest.fixture
+def items(engine):
+    """Creates three requirements, a use case associated to the first two of
+    them and a test associated to the first one.
+    """
+    dal.create_requirements([{'req_id': req_id, 'description': req_id,
+            'req_type': 'F', 'priority': 'O'}
+            for req_id in ['R1', 'R2', 'R3']])
+    dal.create_use_cases([{'uc_id': 'UC1', 'description': 'UC1',
+            'requirements': ['R1', 'R2']}])
+    dal.create_tests([{'test_id': 'T1', 'description': 'T1',
+            'requirements': ['R1']}])
+
+
+def _get_rows(engine, table):
+    """Returns the sorted list of the rows of the given association table.
+    """
+    return sorted(tuple(row) for row in engine.execute(
+            'SELECT * FROM {0}'.format(table)))
+
+
+def test_only_differences_are_applied(engine, items, statements):
+    assert _get_rows(engine, 'UseCasesRequirements') == [('R1', 'UC1'),
+            ('R2', 'UC1')]
+    del statements[:]
+    dal.update_use_case_associations('UC1', ['R2', 'R3'])
+    assert _get_rows(engine, 'UseCasesRequirements') == [('R2', 'UC1'),
+            ('R3', 'UC1')]
+    writes = [statement for statement, unused_parameters in statements
+            if statement.startswith(('INSERT', 'DELETE'))]
+    assert len(writes) == 2
+    assert _get_rows(engine, 'RequirementsTests') == [('R1', 'T1')]
+
+
+def test_unchanged_associations_are_not_written(engine, items, statements):
+    del statements[:]
+    dal.update_use_case_associations('UC1', ['R2', 'R1', 'R1'])
+    assert not [statement for statement, unused_parameters in statements
+            if statement.startswith(('INSERT', 'DELETE'))]
+    assert _get_rows(engine, 'UseCasesRequirements') == [('R1', 'UC1'),
+            ('R2', 'UC1')]
+
+
+def test_requirement_associations(engine, items):
+    dal.update_requirement_associations('R3', ['UC1'], ['T1'])
+    dal.update_requirement_associations('R1', [], [])
+    assert _get_rows(engine, 'UseCasesRequirements') == [('R2', 'UC1'),
+            ('R3', 'UC1')]
+    assert _get_rows(engine, 'RequirementsTests') == [('R3', 'T1')]
+
+
+def test_test_associations(engine, items):
+    dal.update_test_associations('T1', ['R2', 'R3'])
+    assert _get_rows(engine, 'RequirementsTests') == [('R2', 'T1'),
+            ('R3', 'T1')]
+
+
+def test_unknown_item_raises(engine, items):
+    with pytest.raises(NoResultFound):
+        dal.update_use_case_associations('UC9', ['R1'])
+    with pytest.raises(NoResultFound):
+        dal.update_test_associations('T9', [])
+    assert _get_rows(engine, 'UseCasesRequirements') == [('R1', 'UC1'),
+            ('R2', 'UC1')]
+    assert _get_rows(engine, 'RequirementsTests') == [('R1', 'T1')]
+
+
+def test_unknown_id_to_add_raises(engine, items):
+    with pytest.raises(NoResultFound):
+        dal.update_use_case_associations('UC1', ['R3', 'R9'])
+    with pytest.raises(NoResultFound):
+        dal.update_requirement_associations('R1', ['UC1'], ['T9'])
+    assert _get_rows(engine, 'UseCasesRequirements') == [('R1', 'UC1'),
+            ('R2', 'UC1')]
+    assert _get_rows(engine, 'RequirementsTests') == [('R1', 'T1')]
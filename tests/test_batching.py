@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the handling of the batches of events produced by saving items.
+"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.controller import batching
+from src.model import dal
+
+
+def test_last_update_wins_and_order_is_kept():
+    events = [('update_requirement_description', {'req_id': 'R1', 'n': 1}),
+            ('update_requirement_priority', {'req_id': 'R1', 'n': 2}),
+            ('update_requirement_description', {'req_id': 'R2', 'n': 3}),
+            ('update_requirement_description', {'req_id': 'R1', 'n': 4}),
+            ('update_use_case_description', {'uc_id': 'R1', 'n': 5})]
+    assert [params['n'] for unused_name, params
+            in batching.coalesce(events)] == [2, 3, 4, 5]
+
+
+def test_other_events_pass_through():
+    events = [('create_requirement', {'data': 1}),
+            ('update_requirement_id', {'req_id': 'R1', 'new_req_id': 'R2'}),
+            ('update_requirement_id', {'req_id': 'R1', 'new_req_id': 'R3'}),
+            ('delete_requirement', {'req_id': 'R1'}),
+            ('create_requirement', {'data': 1})]
+    coalesced = batching.coalesce(events)
+    assert coalesced == events
+    assert all(pair[1] is original[1] for pair, original
+            in zip(coalesced, events))
+
+
+def test_empty_batch():
+    assert batching.coalesce([]) == []
+
+
+def _handle_event(event_name, params):
+    """Handles the given event by calling the homonymous DAL function.
+    """
+    getattr(dal, event_name)(**params)
+
+
+@pytest.fixture
+def items(engine):
+    """Creates two requirements.
+    """
+    dal.create_requirements([{'req_id': req_id, 'description': req_id,
+            'req_type': 'F', 'priority': 'O'} for req_id in ['R1', 'R2']])
+
+
+def _get_rows(engine):
+    """Returns the sorted (ID, description, priority) rows of requirements.
+    """
+    return sorted(tuple(row) for row in engine.execute(
+            'SELECT req_id, description, priority FROM Requirements'))
+
+
+def test_batch_is_committed(engine, items):
+    assert batching.run_batch([
+            ('update_requirement_description',
+            {'req_id': 'R1', 'description': 'First'}),
+            ('update_requirement_priority', {'req_id': 'R2', 'priority': 'F'}),
+            ('update_requirement_description',
+            {'req_id': 'R1', 'description': 'Last'})], _handle_event)
+    assert _get_rows(engine) == [('R1', 'Last', 'O'), ('R2', 'R2', 'F')]
+
+
+def test_failing_event_rolls_back_batch(engine, items):
+    with pytest.raises(IntegrityError):
+        batching.run_batch([
+                ('update_requirement_description',
+                {'req_id': 'R1', 'description': 'New description'}),
+                ('update_requirement_id',
+                {'req_id': 'R1', 'new_req_id': 'R2'}),
+                ('update_requirement_priority',
+                {'req_id': 'R2', 'priority': 'F'})], _handle_event)
+    assert _get_rows(engine) == [('R1', 'R1', 'O'), ('R2', 'R2', 'O')]
+    # the unit of work has been ended, so a new batch can start
+    assert batching.run_batch([('update_requirement_priority',
+            {'req_id': 'R2', 'priority': 'F'})], _handle_event)
+    assert _get_rows(engine) == [('R1', 'R1', 'O'), ('R2', 'R2', 'F')]
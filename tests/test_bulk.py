@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the bulk creation of items and of the validation of the batches.
+"""
+
+import pytest
+
+from src.model import dal
+
+
+def _requirement(req_id, parent_id=None, **fields):
+    """Returns the record of a valid requirement with the given ID and parent,
+    with the given fields overridden.
+    """
+    record = {'req_id': req_id, 'description': req_id, 'req_type': 'F',
+            'priority': 'O', 'parent_id': parent_id}
+    record.update(fields)
+    return record
+
+
+def _get_rows(engine, statement):
+    """Returns the sorted list of the rows returned by the given statement.
+    """
+    return sorted(tuple(row) for row in engine.execute(statement))
+
+
+@pytest.fixture
+def existing(engine):
+    """Creates a source, a requirement, a use case and a test.
+    """
+    dal.create_source('Source')
+    dal.create_requirement('R0', 'R0', 'F', 'O', None)
+    dal.create_use_case('UC0', 'UC0')
+    dal.create_test('T0', 'T0')
+
+
+def test_valid_requirements_are_stored(engine, existing):
+    source_id = dal.get_source_id('Source')
+    errors = dal.create_requirements([
+            _requirement('R1', 'R0', source_id=source_id, use_cases=['UC0'],
+                    tests=['T0', 'T0']),
+            _requirement('R1.1', 'R1'),
+            _requirement('R1.1.1', 'R1.1')])
+    assert errors == []
+    assert _get_rows(engine, 'SELECT req_id, parent_id, source_id '
+            'FROM Requirements') == [('R0', None, None),
+            ('R1', 'R0', source_id), ('R1.1', 'R1', None),
+            ('R1.1.1', 'R1.1', None)]
+    assert _get_rows(engine, 'SELECT * FROM UseCasesRequirements') == [
+            ('R1', 'UC0')]
+    assert _get_rows(engine, 'SELECT * FROM RequirementsTests') == [
+            ('R1', 'T0')]
+
+
+def test_invalid_ids_are_rejected(engine, existing):
+    errors = dal.create_requirements([_requirement(None),
+            _requirement('R1'), _requirement('R1'), _requirement('R0')])
+    assert errors == [(0, 'Missing ID'), (2, 'Duplicate ID'),
+            (3, 'Existing ID')]
+    assert _get_rows(engine, 'SELECT req_id, description '
+            'FROM Requirements') == [('R0', 'R0'), ('R1', 'R1')]
+
+
+def test_closed_domains_are_checked(engine, existing):
+    errors = dal.create_requirements([_requirement('R1', req_type='X'),
+            _requirement('R2', priority=None), _requirement('R3',
+            source_id=99), _requirement('R4')])
+    assert errors == [(0, 'Invalid type'), (1, 'Invalid priority'),
+            (2, 'Nonexistent source')]
+    assert _get_rows(engine, 'SELECT req_id FROM Requirements') == [
+            ('R0',), ('R4',)]
+
+
+def test_unknown_associated_items_are_rejected(engine, existing):
+    errors = dal.create_requirements([
+            _requirement('R1', use_cases=['UC0', 'UC9']),
+            _requirement('R2', tests=['T8', 'T9']),
+            _requirement('R3', use_cases=['UC0'])])
+    assert errors == [(0, 'Nonexistent associated items: UC9'),
+            (1, 'Nonexistent associated items: T8, T9')]
+    assert _get_rows(engine, 'SELECT * FROM UseCasesRequirements') == [
+            ('R3', 'UC0')]
+    assert _get_rows(engine, 'SELECT * FROM RequirementsTests') == []
+
+
+def test_parents_are_validated(engine, existing):
+    errors = dal.create_requirements([
+            _requirement('R1', 'R9'),  # nonexistent parent
+            _requirement('R2', 'R1'),  # child of a rejected record
+            _requirement('R3', 'R4'),  # cycle
+            _requirement('R4', 'R3'),
+            _requirement('R5', 'R5'),  # its own parent
+            _requirement('R6', 'R7'),  # parent later in the batch
+            _requirement('R7', 'R0')])
+    assert errors == [(0, 'Nonexistent parent'), (1, 'Nonexistent parent'),
+            (2, 'Cyclic parent'), (3, 'Cyclic parent'), (4, 'Cyclic parent')]
+    assert _get_rows(engine, 'SELECT req_id, parent_id '
+            'FROM Requirements') == [('R0', None), ('R6', 'R7'),
+            ('R7', 'R0')]
+
+
+def test_use_cases(engine, existing):
+    errors = dal.create_use_cases([
+            {'uc_id': 'UC1', 'description': 'UC1', 'parent_id': 'UC0',
+            'requirements': ['R0']},
+            {'uc_id': 'UC2', 'description': 'UC2', 'parent_id': 'UC1'},
+            {'uc_id': 'UC3', 'description': 'UC3', 'parent_id': 'UC9'},
+            {'uc_id': 'UC4', 'description': 'UC4', 'requirements': ['R9']},
+            {'uc_id': 'UC0', 'description': 'UC0'}])
+    assert errors == [(2, 'Nonexistent parent'),
+            (3, 'Nonexistent associated items: R9'), (4, 'Existing ID')]
+    assert _get_rows(engine, 'SELECT uc_id, parent_id FROM UseCases') == [
+            ('UC0', None), ('UC1', 'UC0'), ('UC2', 'UC1')]
+    assert _get_rows(engine, 'SELECT * FROM UseCasesRequirements') == [
+            ('R0', 'UC1')]
+
+
+def test_tests(engine, existing):
+    errors = dal.create_tests([
+            {'test_id': 'T1', 'description': 'T1', 'requirements': ['R0']},
+            {'test_id': 'T1', 'description': 'Again'},
+            {'test_id': 'T2', 'requirements': ['R9']}])
+    assert errors == [(1, 'Duplicate ID'),
+            (2, 'Nonexistent associated items: R9')]
+    assert _get_rows(engine, 'SELECT * FROM SystemTests') == [
+            ('T0', 'T0'), ('T1', 'T1')]
+    assert _get_rows(engine, 'SELECT * FROM RequirementsTests') == [
+            ('R0', 'T1')]
+
+
+def test_sources(engine, existing):
+    errors = dal.create_sources(['New', '', 'New', 'Source', 'Other'])
+    assert errors == [(1, 'Missing ID'), (2, 'Duplicate ID'),
+            (3, 'Existing ID')]
+    assert sorted(dal.get_all_source_names()) == ['New', 'Other', 'Source']
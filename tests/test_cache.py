@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the read-through cache of the data access layer.
+"""
+
+import threading
+
+from src.model import dal, database as db
+from src.model.dataaccess import cache
+
+
+def _create_requirements(*req_ids):
+    """Creates requirements with the given IDs.
+    """
+    dal.create_requirements([{'req_id': req_id, 'description': req_id,
+            'req_type': 'F', 'priority': 'O'} for req_id in req_ids])
+
+
+def _read_in_thread(function):
+    """Calls the given function in another thread and returns its result.
+    """
+    results = []
+    thread = threading.Thread(target=lambda: results.append(function()))
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+def test_writes_invalidate_results(engine):
+    _create_requirements('R1')
+    assert dal.get_all_requirement_ids() == ['R1']
+    hits = cache.get_stats()['hits']
+    assert dal.get_all_requirement_ids() == ['R1']
+    assert cache.get_stats()['hits'] == hits + 1
+    _create_requirements('R2')
+    assert sorted(dal.get_all_requirement_ids()) == ['R1', 'R2']
+
+
+def test_unit_of_work_reads_its_own_writes(engine):
+    _create_requirements('R1', 'R2')
+    db.begin_unit_of_work()
+    try:
+        dal.update_requirement_id('R2', 'R3')
+        # another thread only sees (and caches) the committed content
+        assert sorted(_read_in_thread(dal.get_all_requirement_ids)) == [
+                'R1', 'R2']
+        assert sorted(dal.get_all_requirement_ids()) == ['R1', 'R3']
+    finally:
+        assert db.end_unit_of_work()
+    assert sorted(dal.get_all_requirement_ids()) == ['R1', 'R3']
+    assert sorted(_read_in_thread(dal.get_all_requirement_ids)) == [
+            'R1', 'R3']
+
+
+def test_discarded_unit_of_work_leaves_no_trace(engine):
+    _create_requirements('R1')
+    db.begin_unit_of_work()
+    dal.update_requirement_id('R1', 'R2')
+    assert dal.get_all_requirement_ids() == ['R2']
+    db.end_unit_of_work(discard=True)
+    assert dal.get_all_requirement_ids() == ['R1']
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the catalogs of item descriptions shared by the list models.
+"""
+
+import threading
+
+from src.model import dal, database as db
+from src.model.catalog import ItemCatalog
+
+
+def _create_catalog(*item_ids):
+    """Returns a catalog whose loader returns entries for the given IDs and
+    a list counting the times it has been called.
+    """
+    calls = []
+
+    def loader():
+        calls.append(None)
+        return [{'id': item_id, 'description': item_id.lower()}
+                for item_id in sorted(item_ids)]
+    return ItemCatalog(loader), calls
+
+
+def _get_ids(catalog):
+    """Returns the IDs of the entries of the given catalog.
+    """
+    return [entry['id'] for entry in catalog.entries]
+
+
+def test_catalog_is_loaded_lazily_once():
+    catalog, calls = _create_catalog('R1', 'R2')
+    assert calls == []
+    assert _get_ids(catalog) == ['R1', 'R2']
+    assert _get_ids(catalog) == ['R1', 'R2']
+    assert len(calls) == 1
+
+
+def test_entries_are_a_snapshot():
+    catalog, unused_calls = _create_catalog('R1')
+    catalog.entries.append({'id': 'R9', 'description': 'r9'})
+    assert _get_ids(catalog) == ['R1']
+
+
+def test_add_keeps_order():
+    catalog, unused_calls = _create_catalog('R1', 'R3')
+    catalog.entries
+    catalog.add('R2', 'r2')
+    catalog.add('R0', 'r0')
+    catalog.add('R4', 'r4')
+    assert _get_ids(catalog) == ['R0', 'R1', 'R2', 'R3', 'R4']
+
+
+def test_add_of_existing_entry_updates_it():
+    catalog, unused_calls = _create_catalog('R1')
+    catalog.entries
+    catalog.add('R1', 'new')
+    assert catalog.entries == [{'id': 'R1', 'description': 'new'}]
+
+
+def test_remove():
+    catalog, unused_calls = _create_catalog('R1', 'R2', 'R3')
+    catalog.entries
+    catalog.remove('R2')
+    catalog.remove('R9')
+    assert _get_ids(catalog) == ['R1', 'R3']
+
+
+def test_rename_moves_entry_and_keeps_description():
+    catalog, unused_calls = _create_catalog('R1', 'R2', 'R3')
+    catalog.entries
+    catalog.rename('R1', 'R4')
+    assert catalog.entries == [{'id': 'R2', 'description': 'r2'},
+            {'id': 'R3', 'description': 'r3'},
+            {'id': 'R4', 'description': 'r1'}]
+
+
+def test_update_description():
+    catalog, unused_calls = _create_catalog('R1', 'R2')
+    catalog.entries
+    catalog.update_description('R2', 'new')
+    catalog.update_description('R9', 'new')
+    assert catalog.entries == [{'id': 'R1', 'description': 'r1'},
+            {'id': 'R2', 'description': 'new'}]
+
+
+def test_changes_before_loading_are_left_to_the_loader():
+    catalog, calls = _create_catalog('R1')
+    catalog.add('R2', 'r2')
+    catalog.remove('R1')
+    assert calls == []
+    assert _get_ids(catalog) == ['R1']
+
+
+def test_reset_reloads():
+    catalog, calls = _create_catalog('R1')
+    catalog.entries
+    catalog.reset()
+    catalog.entries
+    assert len(calls) == 2
+
+
+def _load_in_thread(catalog):
+    """Reads the entries of the given catalog in another thread.
+    """
+    thread = threading.Thread(target=lambda: catalog.entries)
+    thread.start()
+    thread.join()
+
+
+def test_change_in_unit_of_work_survives_concurrent_load(engine):
+    dal.create_requirement('A', 'Requirement', 'F', 'O', None)
+    catalog = ItemCatalog(dal.get_all_requirement_names_and_descriptions)
+    db.begin_unit_of_work()
+    dal.update_requirement_id('A', 'B')
+    catalog.rename('A', 'B')
+    # another thread can only load the content committed so far
+    _load_in_thread(catalog)
+    assert db.end_unit_of_work()
+    assert dal.get_all_requirement_ids() == ['B']
+    assert _get_ids(catalog) == ['B']
+
+
+def test_discarded_unit_of_work_resets_catalog(engine):
+    dal.create_requirement('A', 'Requirement', 'F', 'O', None)
+    catalog = ItemCatalog(dal.get_all_requirement_names_and_descriptions)
+    db.begin_unit_of_work()
+    dal.create_requirement('B', 'Requirement', 'F', 'O', None)
+    catalog.add('B', 'Requirement')
+    _load_in_thread(catalog)
+    db.end_unit_of_work(discard=True)
+    assert _get_ids(catalog) == ['A']
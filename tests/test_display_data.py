@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the loading and caching of the data of the items to display.
+"""
+
+from src.model import catalog, dal, displaydata
+from src.model.displaydata import (DisplayCache, REQUIREMENT, SOURCE, TEST,
+    USE_CASE)
+
+
+def _store(cache, kind, item_id):
+    """Stores some data for the given item under the current generation.
+    """
+    cache.store(kind, item_id, {'item': item_id}, cache.generation)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = DisplayCache(displaydata._CACHE_SIZE)
+    for item_id in range(displaydata._CACHE_SIZE):
+        _store(cache, REQUIREMENT, item_id)
+    assert cache.get(REQUIREMENT, 0) == {'item': 0}  # now the most recent
+    _store(cache, REQUIREMENT, displaydata._CACHE_SIZE)
+    assert not cache.contains(REQUIREMENT, 1)
+    assert cache.contains(REQUIREMENT, 0)
+    assert cache.contains(REQUIREMENT, displaydata._CACHE_SIZE)
+
+
+def test_hits_and_misses_are_counted():
+    cache = DisplayCache(2)
+    assert cache.get(TEST, 'T1') is None
+    _store(cache, TEST, 'T1')
+    cache.get(TEST, 'T1')
+    cache.get(TEST, 'T1')
+    cache.contains(TEST, 'T2')  # does not count
+    assert cache.stats == {'hits': 2, 'misses': 1, 'hit_rate': 2.0 / 3}
+
+
+def test_data_loaded_under_stale_generation_is_not_stored():
+    cache = DisplayCache(2)
+    generation = cache.generation
+    cache.invalidate(SOURCE, 1)
+    cache.store(SOURCE, 2, {'item': 2}, generation)
+    assert not cache.contains(SOURCE, 2)
+    cache.store(SOURCE, 2, None, cache.generation)
+    assert not cache.contains(SOURCE, 2)
+
+
+def test_invalidation_scope():
+    cache = DisplayCache(8)
+    for kind, item_id in [(REQUIREMENT, 'R1'), (REQUIREMENT, 'R2'),
+            (USE_CASE, 'UC1'), (TEST, 'T1')]:
+        _store(cache, kind, item_id)
+    cache.invalidate(REQUIREMENT, 'R1')
+    assert not cache.contains(REQUIREMENT, 'R1')
+    assert cache.contains(REQUIREMENT, 'R2')
+    cache.invalidate(REQUIREMENT)
+    assert not cache.contains(REQUIREMENT, 'R2')
+    assert cache.contains(USE_CASE, 'UC1')
+    cache.invalidate()
+    assert not cache.contains(USE_CASE, 'UC1')
+    assert not cache.contains(TEST, 'T1')
+
+
+def test_load_display_data(engine):
+    dal.create_source('Source')
+    dal.create_requirement('R1', 'Requirement', 'F', 'O',
+            dal.get_source_id('Source'))
+    try:
+        data = displaydata.load_display_data(REQUIREMENT, 'R1')
+        assert data['item'].source.name == 'Source'
+        assert data['source_names'] == ['Source']
+        assert data['requirement_ids'] == ['R1']
+        assert displaydata.load_display_data(USE_CASE, 'UC9') is None
+    finally:  # the catalogs are shared by the whole process
+        catalog.get_use_case_catalog().reset()
+        catalog.get_test_catalog().reset()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Tests checking that the queries of the data access layer are answered
+through the secondary indexes declared in the mapping.
+"""
+
+from src.model import dal
+
+
+def _create_items():
+    """Creates a small requirement tree with a use case and a test associated
+    to its requirements.
+    """
+    dal.create_source('Source')
+    source_id = dal.get_source_id('Source')
+    dal.create_requirements([{'req_id': req_id, 'description': req_id,
+            'req_type': 'F', 'priority': 'O', 'source_id': source_id,
+            'parent_id': parent_id} for req_id, parent_id in
+            [('R1', None), ('R1.1', 'R1'), ('R1.2', 'R1'), ('R2', None)]])
+    dal.create_use_cases([{'uc_id': 'UC1', 'description': 'UC1',
+            'requirements': ['R1', 'R2']}])
+    dal.create_tests([{'test_id': 'T1', 'description': 'T1',
+            'requirements': ['R1.1']}])
+
+
+def _get_plans(engine, statements, function, *args):
+    """Calls the given function with the given arguments and returns a list
+    with the query plan of each statement it executes, as a (statement,
+    details) pair where details is the text of all the rows of the plan.
+    """
+    del statements[:]
+    result = function(*args)
+    if result is not None:
+        list(result)  # generators only execute their query when consumed
+    plans = []
+    for statement, parameters in list(statements):
+        plans.append((statement, ' '.join(row[-1] for row in engine.execute(
+                'EXPLAIN QUERY PLAN ' + statement, parameters))))
+    return plans
+
+
+def test_children_queries_use_parent_index(engine, statements):
+    _create_items()
+    for function, args in [(dal.get_requirement_children_ids, ('R1',)),
+            (dal.get_requirement_children_summary, ('R1',)),
+            (dal.get_requirement_children_summary, ())]:
+        plans = _get_plans(engine, statements, function, *args)
+        assert len(plans) == 1
+        assert 'ix_Requirements_parent_id' in plans[0][1]
+
+
+def test_table_rows_use_type_priority_index(engine, statements):
+    _create_items()
+    plans = _get_plans(engine, statements, dal.get_requirement_table_rows,
+            'F', 'O')
+    assert len(plans) == 1
+    assert 'ix_Requirements_req_type_priority' in plans[0][1]
+
+
+def test_use_case_statements_use_association_index(engine, statements):
+    _create_items()
+    plans = (_get_plans(engine, statements, dal.update_use_case_id, 'UC1',
+            'UC2') + _get_plans(engine, statements, dal.delete_use_case,
+            'UC2'))
+    plans = [(statement, details) for statement, details in plans
+            if statement.startswith(('UPDATE UseCasesRequirements',
+            'DELETE FROM UseCasesRequirements'))]
+    assert len(plans) == 2
+    for unused_statement, details in plans:
+        assert 'ix_UseCasesRequirements_uc_id' in details
+
+
+def test_test_statements_use_association_index(engine, statements):
+    _create_items()
+    plans = (_get_plans(engine, statements, dal.update_test_id, 'T1', 'T2') +
+            _get_plans(engine, statements, dal.delete_test, 'T2'))
+    plans = [(statement, details) for statement, details in plans
+            if statement.startswith(('UPDATE RequirementsTests',
+            'DELETE FROM RequirementsTests'))]
+    assert len(plans) == 2
+    for unused_statement, details in plans:
+        assert 'ix_RequirementsTests_test_id' in details
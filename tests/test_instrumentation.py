@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the instrumentation of the SQL statements.
+"""
+
+import json
+import os
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from src.model import database as db
+
+
+@pytest.fixture
+def log_location(engine, tmp_path, monkeypatch):
+    """Enables the instrumentation (only for the test) and returns the
+    location of the SQL log.
+    """
+    monkeypatch.setattr(db, '_instrumented', db._instrumented)
+    monkeypatch.setattr(db, '_sql_log_location', db._sql_log_location)
+    log_location = os.path.join(str(tmp_path), 'sql.log')
+    db.enable_sql_instrumentation(log_location)
+    return log_location
+
+
+def test_statements_are_charged_to_scope(engine, log_location):
+    with db.sql_scope('outer'):
+        engine.execute('SELECT 1')
+        with db.sql_scope('inner'):
+            engine.execute('SELECT 1')
+            engine.execute('SELECT 1')
+    with open(log_location) as log_file:
+        records = [json.loads(line) for line in log_file]
+    assert [(record['scope'], record['statements'])
+            for record in records] == [('inner', 2), ('outer', 1)]
+
+
+def test_failed_statements_are_forgotten(engine, log_location):
+    with db.sql_scope('failing'):
+        for unused_i in range(3):
+            with pytest.raises(OperationalError):
+                engine.execute('SELECT * FROM Nonexistent')
+        engine.execute('SELECT 1')
+    assert db._scopes.start_times == {}
+    summary = dict(db.get_sql_summary())
+    assert summary['failing']['statements'] >= 1
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""Tests locking in the number of statements that the data access layer
+executes to load items and their relationships.
+"""
+
+import pytest
+
+from src.model import dal
+
+
+@pytest.fixture
+def items(engine):
+    """Creates a requirement with its source, a child, two use cases and two
+    tests associated to it.
+    """
+    dal.create_source('Source')
+    dal.create_source('Other source')
+    source_id = dal.get_source_id('Source')
+    dal.create_requirements([{'req_id': req_id, 'description': req_id,
+            'req_type': 'F', 'priority': 'O', 'source_id': source_id,
+            'parent_id': parent_id} for req_id, parent_id in
+            [('R1', None), ('R1.1', 'R1')]])
+    dal.create_use_cases([{'uc_id': uc_id, 'description': uc_id,
+            'requirements': ['R1']} for uc_id in ['UC1', 'UC2']])
+    dal.create_tests([{'test_id': test_id, 'description': test_id,
+            'requirements': ['R1']} for test_id in ['T1', 'T2']])
+
+
+def _get_statements(statements, function, *args):
+    """Calls the given function with the given arguments and returns the
+    statements it executes, together with its result.
+    """
+    del statements[:]
+    result = function(*args)
+    return [statement for statement, unused_parameters in statements], result
+
+
+def test_get_requirement(items, statements):
+    executed, requirement = _get_statements(statements, dal.get_requirement,
+            'R1')
+    assert len(executed) == 3
+    assert 'JOIN "Sources"' in executed[0]
+    assert requirement.source.name == 'Source'
+    assert sorted(uc.uc_id for uc in requirement.use_cases) == ['UC1', 'UC2']
+    assert sorted(test.test_id for test in requirement.tests) == ['T1', 'T2']
+
+
+def test_get_use_case(items, statements):
+    executed, use_case = _get_statements(statements, dal.get_use_case, 'UC1')
+    assert len(executed) == 2
+    assert [req.req_id for req in use_case.requirements] == ['R1']
+
+
+def test_get_test(items, statements):
+    executed, test = _get_statements(statements, dal.get_test, 'T1')
+    assert len(executed) == 2
+    assert [req.req_id for req in test.requirements] == ['R1']
+
+
+@pytest.mark.parametrize('function, value', [
+        (dal.update_requirement_description, 'New description'),
+        (dal.update_requirement_parent_id, None),
+        (dal.update_requirement_priority, 'F'),
+        (dal.update_requirement_type, 'D')])
+def test_update_requirement(items, statements, function, value):
+    executed, unused_result = _get_statements(statements, function, 'R1.1',
+            value)
+    assert len(executed) == 2
+    assert executed[0].startswith('SELECT')
+    assert 'JOIN' not in executed[0]
+    assert executed[1].startswith('UPDATE "Requirements"')
+
+
+def test_update_requirement_source(items, statements):
+    executed, unused_result = _get_statements(statements,
+            dal.update_requirement_source, 'R1.1', 'Other source')
+    selects = [statement for statement in executed
+            if statement.startswith('SELECT')]
+    assert len(executed) == 3
+    assert len(selects) == 2  # the requirement and the new source
+    assert not any('JOIN' in statement for statement in selects)
+    assert executed[-1].startswith('UPDATE "Requirements"')
+    assert dal.get_requirement('R1.1').source.name == 'Other source'
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the upgrade of existing databases to the current schema version.
+"""
+
+import os
+
+import pytest
+
+from src.model import database as db
+
+
+# schema of the databases created before the schema was versioned
+_BASELINE_SCHEMA = [
+    '''CREATE TABLE "Sources" (
+        source_id INTEGER NOT NULL,
+        name VARCHAR,
+        PRIMARY KEY (source_id),
+        UNIQUE (name))''',
+    '''CREATE TABLE "UseCases" (
+        uc_id VARCHAR NOT NULL,
+        description VARCHAR NOT NULL,
+        parent_id VARCHAR,
+        image VARCHAR,
+        PRIMARY KEY (uc_id),
+        FOREIGN KEY(parent_id) REFERENCES "UseCases" (uc_id)
+        ON DELETE CASCADE ON UPDATE CASCADE)''',
+    '''CREATE TABLE "SystemTests" (
+        test_id VARCHAR NOT NULL,
+        description VARCHAR,
+        PRIMARY KEY (test_id))''',
+    '''CREATE TABLE "Requirements" (
+        req_id VARCHAR NOT NULL,
+        description VARCHAR,
+        parent_id VARCHAR,
+        req_type VARCHAR(1),
+        priority VARCHAR(1),
+        source_id INTEGER,
+        PRIMARY KEY (req_id),
+        FOREIGN KEY(parent_id) REFERENCES "Requirements" (req_id)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY(source_id) REFERENCES "Sources" (source_id)
+        ON DELETE SET NULL ON UPDATE CASCADE)''',
+    '''CREATE TABLE "UseCasesRequirements" (
+        req_id VARCHAR NOT NULL,
+        uc_id VARCHAR NOT NULL,
+        PRIMARY KEY (req_id, uc_id),
+        FOREIGN KEY(req_id) REFERENCES "Requirements" (req_id)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY(uc_id) REFERENCES "UseCases" (uc_id)
+        ON DELETE CASCADE ON UPDATE CASCADE)''',
+    '''CREATE TABLE "RequirementsTests" (
+        req_id VARCHAR NOT NULL,
+        test_id VARCHAR NOT NULL,
+        PRIMARY KEY (req_id, test_id),
+        FOREIGN KEY(req_id) REFERENCES "Requirements" (req_id)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY(test_id) REFERENCES "SystemTests" (test_id)
+        ON DELETE CASCADE ON UPDATE CASCADE)''',
+    '''INSERT INTO "Requirements" (req_id, description, req_type, priority)
+        VALUES ('R1', 'Requirement', 'F', 'O')''']
+
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    """Returns the engine of a scratch DB having the baseline schema.
+    """
+    engine = db.use_database(os.path.join(str(tmp_path), 'baseline.sqlite'))
+    for statement in _BASELINE_SCHEMA:
+        engine.execute(statement)
+    yield engine
+    db.Session.remove()
+    engine.dispose()
+
+
+def _get_index_names(engine):
+    """Returns the set of the names of the indexes of the DB.
+    """
+    return set(row[0] for row in engine.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"))
+
+
+def _get_table_names(engine):
+    """Returns the set of the names of the tables of the DB.
+    """
+    return set(row[0] for row in engine.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"))
+
+
+def test_upgrade_adds_indexes(baseline_engine):
+    assert db.get_schema_version(baseline_engine) == 0
+    assert db.upgrade_db(baseline_engine) == db.SCHEMA_VERSION
+    assert db.get_schema_version(baseline_engine) == db.SCHEMA_VERSION
+    assert _get_index_names(baseline_engine) >= set([
+            'ix_Requirements_parent_id', 'ix_Requirements_source_id',
+            'ix_Requirements_req_type_priority', 'ix_UseCases_parent_id',
+            'ix_UseCasesRequirements_uc_id', 'ix_RequirementsTests_test_id'])
+    assert baseline_engine.execute(
+            'SELECT COUNT(*) FROM Requirements').scalar() == 1
+    assert db.upgrade_db(baseline_engine) == 0
+
+
+def test_upgrade_matches_new_schema(baseline_engine, engine):
+    db.upgrade_db(baseline_engine)
+    assert _get_index_names(baseline_engine) == _get_index_names(engine)
+
+
+def test_failed_step_is_rolled_back(baseline_engine, monkeypatch):
+    def failing_step(cursor):
+        # the step must run within the transaction opened by upgrade_db
+        assert cursor.connection.isolation_level is None
+        cursor.execute('CREATE TABLE Scratch (scratch_id INTEGER)')
+        raise RuntimeError('Failing step')
+    monkeypatch.setattr(db, '_MIGRATIONS', db._MIGRATIONS + [failing_step])
+    monkeypatch.setattr(db, 'SCHEMA_VERSION', db.SCHEMA_VERSION + 1)
+    with pytest.raises(RuntimeError):
+        db.upgrade_db(baseline_engine)
+    assert db.get_schema_version(baseline_engine) == db.SCHEMA_VERSION - 1
+    assert 'Scratch' not in _get_table_names(baseline_engine)
+    assert 'ix_Requirements_parent_id' in _get_index_names(baseline_engine)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the units of work grouping several operations in one transaction.
+"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.model import dal, database as db
+
+
+@pytest.fixture
+def items(engine):
+    """Creates two requirements.
+    """
+    dal.create_requirements([{'req_id': req_id, 'description': req_id,
+            'req_type': 'F', 'priority': 'O'} for req_id in ['R1', 'R2']])
+
+
+def _get_rows(engine):
+    """Returns the sorted (ID, description, priority) rows of requirements.
+    """
+    return sorted(tuple(row) for row in engine.execute(
+            'SELECT req_id, description, priority FROM Requirements'))
+
+
+def test_unit_is_committed_together(engine, items):
+    db.begin_unit_of_work()
+    dal.update_requirement_description('R1', 'New description')
+    dal.update_requirement_priority('R2', 'F')
+    assert _get_rows(engine) == [('R1', 'R1', 'O'), ('R2', 'R2', 'O')]
+    assert db.end_unit_of_work()
+    assert not db.is_in_unit_of_work()
+    assert _get_rows(engine) == [('R1', 'New description', 'O'),
+            ('R2', 'R2', 'F')]
+
+
+def test_failure_rolls_back_whole_unit(engine, items):
+    db.begin_unit_of_work()
+    dal.update_requirement_description('R1', 'New description')
+    dal.update_requirement_priority('R2', 'F')
+    with pytest.raises(IntegrityError):
+        dal.update_requirement_id('R1', 'R2')
+    dal.update_requirement_description('R2', 'After the failure')
+    assert not db.end_unit_of_work()
+    assert not db.is_in_unit_of_work()
+    assert _get_rows(engine) == [('R1', 'R1', 'O'), ('R2', 'R2', 'O')]
+
+
+def test_discarded_unit(engine, items):
+    db.begin_unit_of_work()
+    dal.update_requirement_description('R1', 'New description')
+    assert not db.end_unit_of_work(discard=True)
+    assert _get_rows(engine) == [('R1', 'R1', 'O'), ('R2', 'R2', 'O')]
+
+
+def test_units_cannot_be_nested(engine):
+    db.begin_unit_of_work()
+    try:
+        with pytest.raises(RuntimeError):
+            db.begin_unit_of_work()
+    finally:
+        db.end_unit_of_work(discard=True)